@@ -2,7 +2,7 @@
 
 # --- Environment Setup ---
 ENV_NAME=".venv"
-TEST_COMMAND="PYTHONPATH=src pytest -s -v tests/test_gui.py"
+TEST_COMMAND="PYTHONPATH=src pytest -s -v tests"
 
 if [ ! -d "$ENV_NAME" ]; then
     echo "Creating new virtual environment: $ENV_NAME"
@@ -68,6 +68,7 @@ class ApplicationWindow(QWidget):
         # SLOTS
         self.contents_pane.add_image_button.clicked.connect(self.service.add_image)
         self.contents_pane.detect_objects_button.clicked.connect(self.service.detect)
+        self.contents_pane.cancel_button.clicked.connect(self.service.cancel_detection)
         self.contents_pane.up_button.clicked.connect(self.service.up)
         self.contents_pane.down_button.clicked.connect(self.service.down)
         self.contents_pane.delete_button.clicked.connect(self.service.delete_layer)
@@ -31,6 +31,10 @@ class ContentsPane(QWidget):
         self.detect_objects_button = QPushButton("Detect Objects")
         layout.addWidget(self.detect_objects_button)
 
+        self.cancel_button = QPushButton("Cancel Detection")
+        self.cancel_button.setVisible(False)
+        layout.addWidget(self.cancel_button)
+
         self.up_button = QPushButton("Up")
         layout.addWidget(self.up_button)
 
@@ -56,3 +60,8 @@ class ContentsPane(QWidget):
         self.progress_bar.setTextVisible(True)
         self.progress_bar.setFormat("Progress: %p")
         layout.addWidget(self.progress_bar)
+
+    def set_detection_running(self, running: bool):
+        """Swap the detect button for the cancel button while a detection runs."""
+        self.detect_objects_button.setEnabled(not running)
+        self.cancel_button.setVisible(running)
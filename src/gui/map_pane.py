@@ -3,6 +3,10 @@ Define the InteractiveGraphicsView class, a customized QGraphicsView.
 Provides interactive features: smooth zooming with
 the mouse wheel and scroll-hand panning.
 
+Buildings of polygon layers can be picked with a click, selected with a
+Shift-drag rubber band and show their id and area on hover. All three go
+through the spatial index of the layer rather than Qt item hit-testing.
+
 Classes:
     - InteractiveGraphicsView: Extends QGraphicsView
 
@@ -10,20 +14,28 @@ Usage Example:
     view = InteractiveGraphicsView(scene)
     view.show()
 """
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPainter, QWheelEvent
+from PyQt6.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QMouseEvent, QPainter, QWheelEvent
 from PyQt6.QtWidgets import (
     QGraphicsScene,
     QGraphicsView,
+    QToolTip,
     QWidget,
 )
 
 from utils.helpers import compute_zoom
+from utils.polygon_layer import PolygonLayer
+
+#: Maximum cursor travel, in pixels, for a press and release to count as a click
+CLICK_DISTANCE = 4
 
 
 class MapPane(QGraphicsView):
     """A custom QGraphicsView that supports interactive zooming with the mouse wheel."""
 
+    #: Emitted with the polygon layer and the indices of its selected buildings
+    buildings_selected = pyqtSignal(object, object)
+
     def __init__(self, scene: QGraphicsScene, parent: QWidget = None):
         """
         Initialize the interactive graphics view.
@@ -44,6 +56,87 @@ class MapPane(QGraphicsView):
         self._min_zoom = -10
         self._max_zoom = 10
 
+        self.setMouseTracking(True)
+        self._press_pos = None
+        self._rubber_band_scene_rect = QRectF()
+        self.rubberBandChanged.connect(self._on_rubber_band_changed)
+
+    def polygon_layers(self) -> list[PolygonLayer]:
+        """Visible polygon layers, topmost first."""
+        return [
+            item for item in self.scene().items(Qt.SortOrder.DescendingOrder)
+            if isinstance(item, PolygonLayer) and item.isVisible()
+        ]
+
+    def building_at(self, scene_pos: QPointF):
+        """
+        Find the topmost building at `scene_pos`.
+
+        Returns:
+            tuple: The polygon layer and building index, or `(None, None)`.
+        """
+        for layer in self.polygon_layers():
+            index = layer.pick(layer.mapFromScene(scene_pos))
+            if index is not None:
+                return layer, index
+        return None, None
+
+    def select_buildings(self, layer: PolygonLayer, indices):
+        """Select `indices` of `layer`, clearing the selection of other layers."""
+        for other in self.polygon_layers():
+            if other is not layer and len(other.selection):
+                other.set_selection([])
+        if layer is not None:
+            layer.set_selection(indices)
+        self.buildings_selected.emit(layer, layer.selection if layer is not None else [])
+
+    def mousePressEvent(self, event: QMouseEvent):
+        """Start a pan, or a rubber band selection when Shift is held."""
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._press_pos = event.position()
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        """Show the id and area of the hovered building."""
+        super().mouseMoveEvent(event)
+        if event.buttons() != Qt.MouseButton.NoButton:
+            return
+        layer, index = self.building_at(self.mapToScene(event.position().toPoint()))
+        if layer is None:
+            QToolTip.hideText()
+        else:
+            QToolTip.showText(event.globalPosition().toPoint(), layer.describe(index), self)
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        """Finish a rubber band selection, or pick the building under a click."""
+        super().mouseReleaseEvent(event)
+        if event.button() != Qt.MouseButton.LeftButton or self._press_pos is None:
+            return
+
+        if self.dragMode() == QGraphicsView.DragMode.RubberBandDrag:
+            self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+            self.select_in_rect(self._rubber_band_scene_rect)
+        elif (event.position() - self._press_pos).manhattanLength() <= CLICK_DISTANCE:
+            layer, index = self.building_at(self.mapToScene(event.position().toPoint()))
+            self.select_buildings(layer, [] if index is None else [index])
+        self._press_pos = None
+
+    def select_in_rect(self, scene_rect: QRectF):
+        """Select the buildings of the topmost polygon layer intersecting `scene_rect`."""
+        for layer in self.polygon_layers():
+            indices = layer.query_rect(layer.mapRectFromScene(scene_rect))
+            if len(indices):
+                self.select_buildings(layer, indices)
+                return
+        self.select_buildings(None, [])
+
+    def _on_rubber_band_changed(self, viewport_rect, from_scene: QPointF, to_scene: QPointF):
+        # The last emission of a drag has a null rectangle; keep the one before it.
+        if not viewport_rect.isNull():
+            self._rubber_band_scene_rect = QRectF(from_scene, to_scene).normalized()
+
     def wheelEvent(self, event: QWheelEvent):
         """
         Handle mouse wheel events to perform zooming in/out.
@@ -1 +1,14 @@
-from .object_detection import label_func, get_model, predict_polygons
+from .object_detection import (
+    label_func,
+    get_model,
+    predict_polygons,
+    predict_polygons_batch,
+    iter_predict_polygons,
+    DEFAULT_MODEL_PATH,
+)
+from .postprocessing import Detection
+from .tiling import DetectionCancelled
+from .backends import InferenceBackend, FastaiBackend, TorchScriptBackend, load_backend
+from .registry import ModelRegistry, model_registry
+from .cache import PredictionCache, prediction_cache
+from .raster import RasterSource, open_raster
@@ -0,0 +1,171 @@
+"""Inference backends running the segmentation network on image tiles.
+
+All the detection pipeline needs from a model is a forward pass over a
+batch of tiles. Backends hide how that pass is made:
+
+    - FastaiBackend: wraps an exported FastAI `Learner` (`.pkl`).
+    - TorchScriptBackend: runs a traced network (`.pt`) with plain `torch`
+      and numpy preprocessing, without importing fastai.
+
+Usage Example:
+    backend = load_backend("resources/model/building_segmentation.pkl")
+    probabilities = backend.predict_proba(tiles)
+"""
+import json
+import os
+
+import numpy as np
+
+IMAGENET_STATS = ([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+TORCHSCRIPT_EXTENSIONS = (".pt", ".ts")
+METADATA_FILE = "metadata.json"
+
+
+def _probabilities(logits):
+    """Building probabilities from `(n, classes, h, w)` network outputs."""
+    import torch
+
+    if logits.shape[1] == 1:
+        return torch.sigmoid(logits[:, 0])
+    return torch.softmax(logits, dim=1)[:, 1]
+
+
+class InferenceBackend:
+    """
+    Interface of an inference backend.
+
+    Subclasses set `model` to the underlying `torch.nn.Module` and implement
+    `predict_proba`. `source_path` is the file the backend was loaded from,
+    if any.
+    """
+
+    model = None
+    source_path = None
+
+    def predict_proba(self, tiles: np.ndarray) -> np.ndarray:
+        """
+        Run the network on a batch of tiles.
+
+        :param tiles: uint8 array of shape `(n, height, width, 3)`
+        :returns: Building probabilities of shape `(n, height, width)`
+        """
+        raise NotImplementedError
+
+    def predict_tiles(self, tiles: list[np.ndarray], batch_size: int) -> np.ndarray:
+        """Predict many tiles, `batch_size` at a time."""
+        batches = [
+            self.predict_proba(np.stack(tiles[start:start + batch_size]))
+            for start in range(0, len(tiles), batch_size)
+        ]
+        return np.concatenate(batches)
+
+
+class FastaiBackend(InferenceBackend):
+    """Backend running the network of an exported FastAI `Learner`."""
+
+    def __init__(self, learner):
+        self.learner = learner
+        self.model = learner.model.eval()
+        self.mean, self.std = self.normalization_stats()
+
+    def normalization_stats(self):
+        """
+        Mean and std the learner normalizes its inputs with.
+
+        Falls back to ImageNet statistics, which `unet_learner` uses by default.
+        """
+        import torch
+        from fastai.vision.all import Normalize
+
+        for tfm in self.learner.dls.after_batch.fs:
+            if isinstance(tfm, Normalize):
+                return tfm.mean.cpu(), tfm.std.cpu()
+        mean, std = IMAGENET_STATS
+        return torch.tensor(mean).view(1, 3, 1, 1), torch.tensor(std).view(1, 3, 1, 1)
+
+    def predict_proba(self, tiles: np.ndarray) -> np.ndarray:
+        import torch
+
+        device = next(self.model.parameters()).device
+        x = torch.from_numpy(tiles).permute(0, 3, 1, 2).float().div_(255)
+        x = ((x - self.mean) / self.std).to(device)
+        with torch.inference_mode():
+            logits = self.model(x)
+        return _probabilities(logits).cpu().numpy()
+
+    def predict_tiles(self, tiles: list[np.ndarray], batch_size: int) -> np.ndarray:
+        """Predict many tiles through one test DataLoader and `Learner.get_preds`."""
+        # Tiles are already decoded in memory, so worker processes would only add overhead.
+        dl = self.learner.dls.test_dl(tiles, bs=batch_size, num_workers=0)
+        with self.learner.no_bar():
+            preds, _ = self.learner.get_preds(dl=dl)
+        return (preds[:, 1] if preds.shape[1] > 1 else preds[:, 0]).numpy()
+
+
+class TorchScriptBackend(InferenceBackend):
+    """Backend running a network exported with :func:`export_torchscript`."""
+
+    def __init__(self, model_path: str):
+        import torch
+
+        extra_files = {METADATA_FILE: ""}
+        self.model = torch.jit.load(model_path, map_location="cpu", _extra_files=extra_files).eval()
+        metadata = json.loads(extra_files[METADATA_FILE] or "{}")
+        mean, std = metadata.get("mean", IMAGENET_STATS[0]), metadata.get("std", IMAGENET_STATS[1])
+        self.tile_size = metadata.get("tile_size")
+        # Fold the uint8 -> [0, 1] scaling into the normalization constants.
+        self.mean = np.asarray(mean, dtype=np.float32).reshape(1, 1, 1, -1) * 255
+        self.std = np.asarray(std, dtype=np.float32).reshape(1, 1, 1, -1) * 255
+
+    def predict_proba(self, tiles: np.ndarray) -> np.ndarray:
+        import torch
+
+        x = (tiles.astype(np.float32) - self.mean) / self.std
+        x = torch.from_numpy(np.ascontiguousarray(x.transpose(0, 3, 1, 2)))
+        with torch.inference_mode():
+            logits = self.model(x)
+        return _probabilities(logits).numpy()
+
+
+def as_backend(model) -> InferenceBackend:
+    """Wrap a FastAI `Learner` into a backend; backends are returned as is."""
+    if isinstance(model, InferenceBackend):
+        return model
+    return FastaiBackend(model)
+
+
+def load_backend(model_path: str) -> InferenceBackend:
+    """Load the backend matching the extension of `model_path`."""
+    if model_path.lower().endswith(TORCHSCRIPT_EXTENSIONS):
+        backend = TorchScriptBackend(model_path)
+    else:
+        from fastai.vision.all import load_learner
+
+        backend = FastaiBackend(load_learner(model_path))
+    backend.source_path = model_path
+    return backend
+
+
+def export_torchscript(model, output_path: str, tile_size: int = 256):
+    """
+    Trace the network of `model` and save it with its normalization stats.
+
+    Args:
+        model: FastAI `Learner` or :class:`FastaiBackend` to export.
+        output_path (str): Destination `.pt` file.
+        tile_size (int): Side of the square example input used for tracing.
+    """
+    import torch
+
+    backend = as_backend(model)
+    example = torch.zeros(1, 3, tile_size, tile_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(backend.model, example, check_trace=False)
+
+    metadata = {
+        "mean": backend.mean.flatten().tolist(),
+        "std": backend.std.flatten().tolist(),
+        "tile_size": tile_size,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    torch.jit.save(traced, output_path, _extra_files={METADATA_FILE: json.dumps(metadata)})
@@ -0,0 +1,257 @@
+"""Headless batch detector.
+
+Fans images out across a pool of worker processes, each holding one warm
+model, and streams per-image results to a JSON-lines or newline-delimited
+GeoJSON file as they finish. Every finished input is appended to a manifest
+file, so an interrupted run picks up where it stopped.
+
+Usage Example:
+    PYTHONPATH=src python -m object_detection.batch "tiles/*.tif" -o results.jsonl --workers 4
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import glob
+import json
+import os
+import sys
+from typing import Iterable, Optional
+
+from object_detection.object_detection import (  # noqa: F401 (label_func is needed to unpickle the model)
+    DEFAULT_MODEL_PATH,
+    get_model,
+    iter_predict_polygons,
+    label_func,
+)
+from utils.logger_config import logger
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+_worker_options: dict = {}
+
+
+def collect_inputs(source: str) -> list[str]:
+    """
+    Expand `source` into a sorted list of image paths.
+
+    `source` is either a directory, searched recursively for images, or a
+    glob pattern.
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*")
+    else:
+        pattern = source
+    paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(p))
+
+
+def read_manifest(manifest_path: str) -> set[str]:
+    """Return the inputs already recorded as done in `manifest_path`."""
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def to_record(path: str, result, output_format: str = "jsonl") -> dict:
+    """Serialize one `predict_polygons` :class:`Detection` for the output file."""
+    polygons = [coords.astype(float).round(2).tolist() for coords in result.polygons if len(coords) >= 6]
+    stats = {
+        "path": path,
+        "height": int(result.mask.shape[0]),
+        "width": int(result.mask.shape[1]),
+        "coverage_pct": float(result.coverage_pct),
+        "num_features": int(result.num_features),
+        "building_areas": result.areas.tolist(),
+    }
+    if output_format == "jsonl":
+        return {**stats, "polygons": polygons}
+
+    rings = []
+    for coords in polygons:
+        ring = [coords[i:i + 2] for i in range(0, len(coords), 2)]
+        rings.append([ring + ring[:1]])
+    return {
+        "type": "Feature",
+        "geometry": {"type": "MultiPolygon", "coordinates": rings},
+        "properties": stats,
+    }
+
+
+def _init_worker(model_path: str, options: dict, num_threads: Optional[int] = None):
+    """Load the model once per worker process."""
+    if num_threads:
+        import torch
+
+        torch.set_num_threads(num_threads)
+    _worker_options.update(options)
+    get_model(model_path)
+    _worker_options["model_path"] = model_path
+
+
+def _process_chunk(paths: list[str]) -> list[tuple[str, Optional[dict], Optional[str]]]:
+    """Detect objects on `paths` with the worker's warm model."""
+    options = dict(_worker_options)
+    model = get_model(options.pop("model_path"))
+    output_format = options.pop("output_format")
+
+    results = []
+    try:
+        for path, result in iter_predict_polygons(paths, model, **options):
+            results.append((path, to_record(path, result, output_format), None))
+    except Exception as e:
+        # Retry one by one so a single broken file does not fail its chunk.
+        done = {path for path, _, _ in results}
+        for path in paths:
+            if path in done:
+                continue
+            try:
+                [(_, result)] = iter_predict_polygons([path], model, **options)
+                results.append((path, to_record(path, result, output_format), None))
+            except Exception as single_error:
+                results.append((path, None, f"{type(single_error).__name__}: {single_error}"))
+        logger.warning(f"Chunk failed ({e}), retried its images one by one.")
+    return results
+
+
+def _chunks(paths: list[str], size: int) -> Iterable[list[str]]:
+    for start in range(0, len(paths), size):
+        yield paths[start:start + size]
+
+
+def run_batch(
+    paths: list[str],
+    output_path: str,
+    manifest_path: Optional[str] = None,
+    model_path: str = DEFAULT_MODEL_PATH,
+    workers: int = 1,
+    chunk_size: int = 16,
+    output_format: str = "jsonl",
+    batch_size: int = 16,
+    tile_size: int = 256,
+    overlap: int = 32,
+    simplify_tolerance: float = 1.0,
+    regularize: bool = True,
+) -> tuple[int, int]:
+    """
+    Detect objects on `paths`, skipping inputs already in the manifest.
+
+    Args:
+        paths (list): Image paths to process.
+        output_path (str): JSON-lines file results are appended to.
+        manifest_path (str): File listing finished inputs.
+            Defaults to `output_path` with a `.manifest` suffix.
+        model_path (str): Model loaded by each worker.
+        workers (int): Number of worker processes. `0` runs in this process.
+        chunk_size (int): Number of images handed to a worker at once.
+        output_format (str): `"jsonl"` or `"geojson"` (one Feature per line).
+        simplify_tolerance (float): Polygon simplification tolerance in pixels.
+        regularize (bool): Snap building outlines to orthogonal directions.
+
+    Returns:
+        tuple: Number of processed and failed inputs.
+    """
+    manifest_path = manifest_path or f"{output_path}.manifest"
+    done = read_manifest(manifest_path)
+    todo = [p for p in paths if p not in done]
+    logger.info(f"Batch detection: {len(todo)} to process, {len(paths) - len(todo)} already done.")
+
+    options = {
+        "output_format": output_format,
+        "batch_size": batch_size,
+        "tile_size": tile_size,
+        "overlap": overlap,
+        "simplify_tolerance": simplify_tolerance,
+        "regularize": regularize,
+    }
+    processed = failed = 0
+
+    with open(output_path, "a", encoding="utf-8") as output, open(manifest_path, "a", encoding="utf-8") as manifest:
+
+        def write(results):
+            nonlocal processed, failed
+            for path, record, error in results:
+                if error is not None:
+                    failed += 1
+                    logger.error(f"Detection failed for {path}: {error}")
+                    continue
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+                manifest.write(path + "\n")
+                manifest.flush()
+                processed += 1
+            logger.info(f"Batch detection progress: {processed + failed}/{len(todo)}")
+
+        if workers == 0:
+            _init_worker(model_path, options)
+            for chunk in _chunks(todo, chunk_size):
+                write(_process_chunk(chunk))
+            return processed, failed
+
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path, options, num_threads)) as pool:
+            chunks = iter(_chunks(todo, chunk_size))
+            pending = set()
+            while True:
+                # Keep a bounded number of chunks in flight.
+                for chunk in chunks:
+                    pending.add(pool.submit(_process_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+
+    return processed, failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m object_detection.batch",
+        description="Detect buildings on many images without the GUI.",
+    )
+    parser.add_argument("source", help="Directory (searched recursively) or glob pattern of images.")
+    parser.add_argument("-o", "--output", default="detections.jsonl", help="Results file, appended to.")
+    parser.add_argument("--manifest", help="File recording finished inputs (default: OUTPUT.manifest).")
+    parser.add_argument("--format", choices=("jsonl", "geojson"), default="jsonl", dest="output_format")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to the model file.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--chunk-size", type=int, default=16, help="Images per worker task.")
+    parser.add_argument("--batch-size", type=int, default=16, help="Tiles per forward pass.")
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--simplify", type=float, default=1.0, dest="simplify_tolerance",
+                        help="Polygon simplification tolerance in pixels (0 disables).")
+    parser.add_argument("--no-regularize", action="store_false", dest="regularize",
+                        help="Keep traced outlines instead of snapping them to right angles.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    paths = collect_inputs(args.source)
+    if not paths:
+        logger.error(f"No images found for {args.source}.")
+        return 1
+
+    processed, failed = run_batch(
+        paths,
+        args.output,
+        manifest_path=args.manifest,
+        model_path=args.model,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        output_format=args.output_format,
+        batch_size=args.batch_size,
+        tile_size=args.tile_size,
+        overlap=args.overlap,
+        simplify_tolerance=args.simplify_tolerance,
+        regularize=args.regularize,
+    )
+    logger.info(f"Batch detection finished: {processed} processed, {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""On-disk cache of predicted probability masks.
+
+Running the network dominates a detection, and re-running Detect on the
+same image with the same model gives the same mask. `PredictionCache`
+stores masks as compressed `.npz` files keyed by the image content hash,
+the model file hash and the inference parameters, so repeat detections,
+also across sessions, go straight to post-processing. The least recently
+used entries are evicted once the cache directory exceeds its size cap.
+
+Masks are stored as the uint8 levels post-processing thresholds
+(`probability * 255`, truncated), which keeps results identical at a
+quarter of the size.
+
+Usage Example:
+    key = prediction_cache.key(image_path, model_path, tile_size=256, overlap=32)
+    prob_mask = prediction_cache.get(key)
+    if prob_mask is None:
+        prob_mask = run_model(image_path)
+        prediction_cache.put(key, prob_mask)
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from utils.helpers import get_resource_path
+from utils.logger_config import logger
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = get_resource_path("resources/cache/predictions")
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hex BLAKE2b digest of the contents of the file at `path`."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def quantize(prob_mask: np.ndarray) -> np.ndarray:
+    """Probabilities (0-1) to the uint8 levels `smooth_polygons` thresholds."""
+    return (prob_mask * 255).astype(np.uint8)
+
+
+def dequantize(levels: np.ndarray) -> np.ndarray:
+    """Probabilities that quantize back to exactly `levels`."""
+    return np.minimum((levels.astype(np.float32) + 0.5) / 255, 1.0)
+
+
+class PredictionCache:
+    """Size-capped LRU cache of probability masks in a directory."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 512 * 1024**2):
+        """
+        Args:
+            cache_dir (str): Directory holding the `.npz` files. Created on first write.
+            max_bytes (int): Size cap of the directory.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (absolute path, mtime in ns, size) -> digest, so unchanged models are hashed once
+        self._model_digests: dict[tuple[str, int, int], str] = {}
+
+    def model_digest(self, model_path: str) -> str:
+        """Content digest of a model file, memoized while the file is unchanged."""
+        path = os.path.abspath(model_path)
+        stat = os.stat(path)
+        fingerprint = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._model_digests.get(fingerprint)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._model_digests[fingerprint] = digest
+        return digest
+
+    def key(self, image_path: str, model_path: str, **params) -> str:
+        """Cache key of a prediction of `image_path` by `model_path` with `params`."""
+        parts = {
+            "version": CACHE_VERSION,
+            "image": file_digest(image_path),
+            "model": self.model_digest(model_path),
+            "params": params,
+        }
+        return hashlib.blake2b(json.dumps(parts, sort_keys=True).encode(), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Cached probability mask for `key`, or `None` on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                levels = data["levels"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable prediction cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        # The access time is not reliable on all file systems; mark use by mtime.
+        os.utime(path)
+        logger.info(f"Prediction cache hit: {key}")
+        return dequantize(levels)
+
+    def put(self, key: str, prob_mask: np.ndarray):
+        """Store `prob_mask` under `key`, then evict entries above the size cap."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, levels=quantize(prob_mask))
+        # Atomic, so concurrent readers never see a partial file.
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """`(mtime, size, path)` of every cached mask, oldest first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".npz"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Remove the least recently used masks until the cache fits its cap."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                self._remove(path)
+                total -= size
+                logger.info(f"Evicted prediction from cache: {os.path.basename(path)}")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @property
+    def nbytes(self) -> int:
+        """Disk space used by cached masks."""
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def clear(self):
+        """Remove all cached masks."""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+
+prediction_cache = PredictionCache()
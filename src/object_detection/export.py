@@ -0,0 +1,39 @@
+"""Export a FastAI model for fastai-free inference.
+
+Traces the learner's network to TorchScript and stores its normalization
+stats next to it, so `get_model` can run it with a `TorchScriptBackend`.
+
+Usage Example:
+    PYTHONPATH=src python -m object_detection.export src/resources/model/building_segmentation.pkl -o model.pt
+"""
+import argparse
+import os
+import sys
+
+from object_detection.backends import export_torchscript, load_backend
+from object_detection.object_detection import DEFAULT_MODEL_PATH, label_func  # noqa: F401 (needed to unpickle the model)
+from utils.logger_config import logger
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m object_detection.export",
+        description="Export a FastAI building segmentation model to TorchScript.",
+    )
+    parser.add_argument("model", nargs="?", default=DEFAULT_MODEL_PATH, help="Exported FastAI learner (.pkl).")
+    parser.add_argument("-o", "--output", help="Destination file (default: MODEL with a .pt suffix).")
+    parser.add_argument("--tile-size", type=int, default=256, help="Input size used for tracing.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output = args.output or os.path.splitext(args.model)[0] + ".pt"
+
+    export_torchscript(load_backend(args.model), output, tile_size=args.tile_size)
+    logger.info(f"Exported {args.model} to {output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
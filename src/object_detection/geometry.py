@@ -0,0 +1,206 @@
+"""Vectorized polygon simplification and building regularization.
+
+Polygons are processed all at once in a packed layout: one `(n, 2)` array
+holding the vertices of every polygon back to back, and an `offsets` array
+where polygon `i` spans `coords[offsets[i]:offsets[i + 1]]`.
+
+Usage Example:
+    coords, offsets = pack_polygons(polygons)
+    coords, offsets = simplify_packed(coords, offsets, tolerance=1.0)
+    coords, offsets = regularize_packed(coords, offsets)
+    polygons = unpack_polygons(coords, offsets)
+"""
+import numpy as np
+
+
+def pack_polygons(polygons) -> tuple[np.ndarray, np.ndarray]:
+    """Pack flat `[x1, y1, x2, y2, ...]` polygons into `(coords, offsets)`."""
+    counts = np.fromiter(map(len, polygons), dtype=np.int64, count=len(polygons)) // 2
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if len(counts):
+        coords = np.concatenate(polygons).astype(np.float64, copy=False).reshape(-1, 2)
+    else:
+        coords = np.empty((0, 2), dtype=np.float64)
+    return coords, offsets
+
+
+def unpack_polygons(coords: np.ndarray, offsets: np.ndarray, dtype=np.float32) -> list:
+    """Split packed polygons back into flat `[x1, y1, x2, y2, ...]` arrays."""
+    flat = coords.astype(dtype).reshape(-1)
+    return [flat[2 * start:2 * end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _neighbours(offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Polygon index, previous and next vertex index of every packed vertex."""
+    counts = np.diff(offsets)
+    polygon = np.repeat(np.arange(len(counts)), counts)
+    index = np.arange(offsets[-1])
+    start, count = offsets[:-1][polygon], counts[polygon]
+    prev = start + (index - start - 1) % count
+    nxt = start + (index - start + 1) % count
+    return polygon, prev, nxt
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+
+def simplify_packed(
+    coords: np.ndarray, offsets: np.ndarray, tolerance: float = 1.0, min_vertices: int = 4
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Drop vertices lying within `tolerance` pixels of the chord between their neighbours.
+
+    Each round removes, across all polygons at once, the vertices that are
+    closer to their chord than both neighbours, so no two adjacent vertices
+    go in the same round. Rounds repeat until nothing changes. Polygons are
+    never reduced below `min_vertices` vertices.
+    """
+    while len(coords):
+        polygon, prev, nxt = _neighbours(offsets)
+        chord = coords[nxt] - coords[prev]
+        chord_length = np.hypot(chord[:, 0], chord[:, 1])
+        distance = np.abs(_cross(chord, coords - coords[prev])) / np.maximum(chord_length, 1e-12)
+        # A vertex between two coincident neighbours is a spike.
+        distance[chord_length < 1e-12] = 0
+
+        remove = (distance <= tolerance) & (distance <= distance[prev]) & (distance < distance[nxt])
+        counts = np.diff(offsets)
+        removed = np.bincount(polygon[remove], minlength=len(counts))
+        remove &= (counts - removed >= min_vertices)[polygon]
+        if not remove.any():
+            break
+
+        keep = ~remove
+        coords = coords[keep]
+        offsets = np.zeros_like(offsets)
+        np.cumsum(np.bincount(polygon[keep], minlength=len(counts)), out=offsets[1:])
+    return coords, offsets
+
+
+def regularize_packed(
+    coords: np.ndarray,
+    offsets: np.ndarray,
+    angle_tolerance: float = 15.0,
+    max_shift: float = 3.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Snap building outlines to their dominant pair of orthogonal directions.
+
+    The dominant direction of each polygon is the length-weighted mean of
+    its edge angles modulo 90 degrees. Edges within `angle_tolerance`
+    degrees of it (or of its perpendicular) are snapped, consecutive snapped
+    edges with the same orientation are merged into one, and vertices are
+    rebuilt as intersections of neighbouring edge lines. Vertices that would
+    move more than `max_shift` pixels keep their original position.
+    """
+    if not len(coords):
+        return coords, offsets
+
+    counts = np.diff(offsets)
+    polygon, prev, nxt = _neighbours(offsets)
+    edge = coords[nxt] - coords
+    length = np.hypot(edge[:, 0], edge[:, 1])
+    angle = np.arctan2(edge[:, 1], edge[:, 0])
+
+    # Length-weighted circular mean of 4 * angle gives the dominant direction mod 90 degrees.
+    sin_sum = np.bincount(polygon, weights=length * np.sin(4 * angle), minlength=len(counts))
+    cos_sum = np.bincount(polygon, weights=length * np.cos(4 * angle), minlength=len(counts))
+    dominant = np.arctan2(sin_sum, cos_sum) / 4
+
+    quarter = np.round((angle - dominant[polygon]) / (np.pi / 2))
+    snapped_angle = dominant[polygon] + quarter * (np.pi / 2)
+    snapped = np.abs(angle - snapped_angle) <= np.radians(angle_tolerance)
+    snapped &= length > 0
+    parity = quarter.astype(np.int64) % 2
+    direction = np.where(snapped, snapped_angle, angle)
+
+    # An edge continues the previous edge's run when both are snapped to the same orientation.
+    edge_prev = prev
+    continues = snapped & snapped[edge_prev] & (parity == parity[edge_prev])
+    run_start = ~continues
+    # Polygons made of a single run cannot be rebuilt; leave them as they are.
+    has_start = np.bincount(polygon[run_start], minlength=len(counts)) > 0
+
+    # Rotate each polygon so that it begins with a run start; runs then never wrap around.
+    index = np.arange(len(coords))
+    first_start = np.full(len(counts), np.iinfo(np.int64).max)
+    np.minimum.at(first_start, polygon[run_start], index[run_start])
+    first_start = np.where(has_start, first_start, offsets[:-1])
+    start, count = offsets[:-1][polygon], counts[polygon]
+    order = start + (index - start + first_start[polygon] - start) % count
+    coords, edge, length, direction, run_start = (
+        coords[order], edge[order], length[order], direction[order], run_start[order]
+    )
+    run_start[offsets[:-1][counts > 0]] = True
+
+    # One line per run: its direction and the length-weighted mean of its edge midpoints.
+    run = np.cumsum(run_start) - 1
+    run_polygon = polygon[run_start]
+    weight = np.maximum(np.bincount(run, weights=length), 1e-12)
+    midpoint = coords + edge / 2
+    point = np.stack(
+        [np.bincount(run, weights=length * midpoint[:, i]) / weight for i in range(2)], axis=1
+    )
+    degenerate = weight <= 1e-12
+    point[degenerate] = coords[run_start][degenerate]
+    unit = np.stack([np.cos(direction[run_start]), np.sin(direction[run_start])], axis=1)
+
+    # Vertex at the start of each run: intersection with the previous run's line.
+    run_counts = np.bincount(run_polygon, minlength=len(counts))
+    run_offsets = np.zeros_like(offsets)
+    np.cumsum(run_counts, out=run_offsets[1:])
+    _, run_prev, _ = _neighbours(run_offsets)
+    original = coords[run_start]
+    denominator = _cross(unit[run_prev], unit)
+    t = _cross(point - point[run_prev], unit) / np.where(np.abs(denominator) < 1e-6, 1, denominator)
+    vertex = point[run_prev] + t[:, None] * unit[run_prev]
+    moved = np.hypot(*(vertex - original).T)
+    fallback = (np.abs(denominator) < 1e-6) | (moved > max_shift) | ~np.isfinite(moved)
+    vertex[fallback] = original[fallback]
+
+    # Keep polygons that collapsed below a triangle, or were a single run, unchanged.
+    valid = (run_counts >= 3) & has_start
+    keep_vertex = valid[run_polygon]
+    keep_original = ~valid[polygon]
+    new_counts = np.where(valid, run_counts, counts)
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(new_counts, out=new_offsets[1:])
+
+    result = np.empty((new_offsets[-1], 2), dtype=np.float64)
+    target_polygon = np.repeat(np.arange(len(counts)), new_counts)
+    target_valid = valid[target_polygon]
+    result[target_valid] = vertex[keep_vertex]
+    result[~target_valid] = coords[keep_original]
+    return result, new_offsets
+
+
+def refine_polygons(
+    polygons,
+    tolerance: float = 1.0,
+    regularize: bool = True,
+    angle_tolerance: float = 15.0,
+) -> tuple[list, tuple[int, int]]:
+    """
+    Simplify and optionally regularize traced building polygons.
+
+    Args:
+        polygons (list): Flat `[x1, y1, x2, y2, ...]` polygons.
+        tolerance (float): Simplification tolerance in pixels. `0` disables it.
+        regularize (bool): Snap outlines to their dominant orthogonal directions.
+        angle_tolerance (float): Maximum deviation in degrees of snapped edges.
+
+    Returns:
+        tuple: Refined polygons (same order and count) and the vertex counts
+            before and after refinement.
+    """
+    coords, offsets = pack_polygons(polygons)
+    before = len(coords)
+    if tolerance > 0:
+        coords, offsets = simplify_packed(coords, offsets, tolerance)
+    if regularize:
+        coords, offsets = regularize_packed(coords, offsets, angle_tolerance, max_shift=max(3.0, 3 * tolerance))
+        if tolerance > 0:
+            coords, offsets = simplify_packed(coords, offsets, tolerance=min(tolerance, 0.5))
+    return unpack_polygons(coords, offsets), (before, len(coords))
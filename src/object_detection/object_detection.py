@@ -1,14 +1,21 @@
-"""Module for detecting objects using machine learning."""
+"""Module for detecting objects using machine learning.
+
+Heavy libraries (torch, fastai, cv2) are imported on first
+use rather than at import time, so the GUI can start without loading them.
+"""
 from pathlib import Path
 
-from cv2 import GaussianBlur, threshold, THRESH_BINARY
-from fastai.vision.all import load_learner, PILImage, Learner
-from imantics import Mask
-from numpy import ones, uint8
-from scipy.ndimage import label
 
-# from utils.helpers import get_resource_path
+from utils.helpers import get_resource_path
 from utils.logger_config import logger
+from .backends import InferenceBackend, as_backend
+from .cache import prediction_cache
+from .postprocessing import Detection, postprocess_mask, predict_coverage, smooth_polygons  # noqa: F401
+from .raster import open_raster
+from .registry import model_registry
+from .tiling import DetectionCancelled, TileBlender, cut_tile, predict_tiled, tile_windows
+
+DEFAULT_MODEL_PATH = get_resource_path("resources/model/building_segmentation.pkl")
 
 
 def label_func(fname: Path) -> Path:
@@ -24,69 +31,163 @@ def label_func(fname: Path) -> Path:
     return fname.parent / fname.name.replace("image", "label")
 
 
-def get_model(model_path: str) -> Learner:
-    """
-    Load custom FastAI model.
-    Ensures `label_func` is in scope when unpickling.
+def get_model(model_path: str = DEFAULT_MODEL_PATH) -> InferenceBackend:
     """
-    learn = load_learner(model_path)
-    return learn
+    Load custom model as an inference backend.
 
+    FastAI learners (`.pkl`) are wrapped in a `FastaiBackend`; ensures
+    `label_func` is in scope when unpickling. TorchScript exports (`.pt`)
+    are run by a `TorchScriptBackend` without importing fastai.
 
-def predict_polygons(path_to_img, model=None, progress_callback=None):
+    Models are served from `model_registry`, so repeat calls with an
+    unchanged file return the already loaded backend.
     """
-    Detect objects on image with `path_to_img` using `model`
-
-    :returns: Polygons representation
-    :rtype: :class:`Polygons`
+    return model_registry.get(model_path)
+
+
+def warm_up_imports():
+    """Import the post-processing libraries ahead of the first detection."""
+    import cv2  # noqa: F401
+
+
+def predict_polygons(
+    path_to_img,
+    model=None,
+    progress_callback=None,
+    tile_size=256,
+    overlap=32,
+    batch_size=8,
+    cancel_event=None,
+    simplify_tolerance=1.0,
+    regularize=True,
+    cache=prediction_cache,
+):
     """
-    progress_callback(40)
-
-    img = PILImage.create(path_to_img)
-    img = img.resize((256, 256))
+    Detect objects on image with `path_to_img` using `model`,
+    an inference backend or a FastAI `Learner`.
+
+    The image is read window by window through a :class:`RasterSource`
+    and predicted at full resolution with overlapping `tile_size` windows,
+    `batch_size` windows at a time.
+    `progress_callback` receives the percentage done; most of the range
+    advances per predicted batch. Setting `cancel_event` stops the run
+    between batches with :class:`DetectionCancelled`.
+    `simplify_tolerance` and `regularize` control polygon refinement,
+    see :func:`postprocess_mask`.
+
+    Probability masks of models loaded from a file are kept in `cache`
+    (a :class:`PredictionCache`, `None` disables it); a hit skips decoding
+    the image and running the network.
+
+    :returns: Polygons, coverage percentage, number of buildings, the
+        binary mask and per-building statistics
+    :rtype: :class:`Detection`
+    """
+    progress_callback = progress_callback or (lambda _: None)
 
     if model is None:
         model = get_model()
+    backend = as_backend(model)
+
+    progress_callback(10)
+
+    cache_key = None
+    if cache is not None and backend.source_path is not None:
+        cache_key = cache.key(path_to_img, backend.source_path, tile_size=tile_size, overlap=overlap)
+        prob_mask = cache.get(cache_key)
+        if prob_mask is not None:
+            progress_callback(90)
+            return postprocess_mask(prob_mask, simplify_tolerance, regularize)
+
+    img = open_raster(path_to_img)
+
+    progress_callback(20)
+
+    prob_mask = predict_tiled(
+        img,
+        backend.predict_proba,
+        tile_size=tile_size,
+        overlap=overlap,
+        batch_size=batch_size,
+        progress_callback=lambda fraction: progress_callback(20 + int(70 * fraction)),
+        cancel_event=cancel_event,
+    )
+
+    if cache_key is not None:
+        try:
+            cache.put(cache_key, prob_mask)
+        except OSError as e:
+            logger.warning(f"Could not cache the prediction of {path_to_img}: {e}")
+
+    return postprocess_mask(prob_mask, simplify_tolerance, regularize)
+
+
+def iter_predict_polygons(
+    paths,
+    model=None,
+    batch_size=16,
+    tile_size=256,
+    overlap=32,
+    max_tiles=512,
+    simplify_tolerance=1.0,
+    regularize=True,
+):
+    """
+    Detect objects on many images, yielding `(path, result)` as they finish.
 
-    progress_callback(50)
-
-    pred_mask, _, _ = model.predict(img)
-
-    progress_callback(70)
-
-    mask_np = pred_mask.cpu().numpy().squeeze()
-    mask_np = smooth_polygons(mask_np)
-    coverage_pct, num_features = predict_coverage(mask_np)
-    polygons = Mask(mask_np).polygons()
-    return polygons, coverage_pct, num_features
-
-
-def predict_coverage(mask_np):
-    total_pixels = mask_np.size
-    building_pixels = (mask_np == 1).sum()
-    coverage_pct = (building_pixels / total_pixels) * 100
-    logger.info(f"Estimated building coverage: {coverage_pct:.2f}%")
-
-    structure = ones((3, 3), dtype=int)
-    _, num_features = label(mask_np, structure=structure)
-    logger.info(f"Estimated number of separate buildings: {num_features}")
-
-    return coverage_pct, num_features
-
-
-def smooth_polygons(mask_np):
-    if mask_np.max() <= 1.0:
-        mask_np = (mask_np * 255).astype(uint8)
-    else:
-        mask_np = mask_np.astype(uint8)
-
-    smoothed_mask = GaussianBlur(mask_np, (5, 5), 0)
-
-    _, smoothed_mask = threshold(smoothed_mask, 127, 255, THRESH_BINARY)
-
-    smoothed_mask = smoothed_mask.astype(bool)
-    return smoothed_mask
+    Tiles of consecutive images are gathered into chunks of up to about
+    `max_tiles` windows and predicted in batches of `batch_size`. With a
+    FastAI model a chunk is one test DataLoader run through `Learner.get_preds`,
+    instead of building a DataLoader per image as `Learner.predict` does.
+    `result` is the :class:`Detection` `predict_polygons` returns.
+    """
+    if model is None:
+        model = get_model()
+    model = as_backend(model)
+    refine = {"simplify_tolerance": simplify_tolerance, "regularize": regularize}
+
+    chunk, num_tiles = [], 0
+    for path in paths:
+        img = open_raster(path)
+        windows = tile_windows(img.shape[0], img.shape[1], tile_size, overlap)
+        chunk.append((path, img, windows))
+        num_tiles += len(windows)
+        if num_tiles >= max_tiles:
+            yield from _predict_chunk(model, chunk, batch_size, tile_size, overlap, refine)
+            chunk, num_tiles = [], 0
+
+    if chunk:
+        yield from _predict_chunk(model, chunk, batch_size, tile_size, overlap, refine)
+
+
+def _predict_chunk(model, chunk, batch_size, tile_size, overlap, refine):
+    tiles = [cut_tile(img, y, x, tile_size) for _, img, windows in chunk for y, x in windows]
+    probabilities = model.predict_tiles(tiles, batch_size)
+
+    start = 0
+    for path, img, windows in chunk:
+        blender = TileBlender(img.shape[:2], tile_size, overlap)
+        blender.add_batch(probabilities[start:start + len(windows)], windows)
+        start += len(windows)
+        yield path, postprocess_mask(blender.result(), **refine)
+
+
+def predict_polygons_batch(
+    paths, model=None, batch_size=16, tile_size=256, overlap=32, simplify_tolerance=1.0, regularize=True
+):
+    """
+    Detect objects on every image in `paths` with batched inference.
 
-# TODO: Implement calculate percentage of land covered by buildings
-# TODO: Implement count number of distinct buildings
-# TODO: Implement polygons regularization
+    :returns: One :class:`Detection` per image
+    :rtype: list
+    """
+    results = iter_predict_polygons(
+        paths,
+        model,
+        batch_size=batch_size,
+        tile_size=tile_size,
+        overlap=overlap,
+        simplify_tolerance=simplify_tolerance,
+        regularize=regularize,
+    )
+    return [result for _, result in results]
@@ -0,0 +1,133 @@
+"""Post-processing of predicted building masks.
+
+A probability mask is smoothed and thresholded once, then a single
+connected-components pass yields coverage, building count and per-building
+statistics, and a single contour extraction yields the polygons, which are
+then simplified and regularized (see `geometry`).
+
+Usage Example:
+    detection = postprocess_mask(probabilities)
+    detection.coverage_pct, detection.num_features, detection.areas
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from utils.logger_config import logger
+from .geometry import refine_polygons
+
+
+class Detection(NamedTuple):
+    """Result of a detection on one image.
+
+    Per-building arrays are indexed by building id, `0` to `num_features - 1`.
+    """
+
+    #: Flat `[x1, y1, x2, y2, ...]` arrays, one per traced contour
+    polygons: list
+    coverage_pct: float
+    num_features: int
+    #: Binary mask the polygons were traced from
+    mask: np.ndarray
+    #: Pixel area of each building, shape `(n,)`
+    areas: np.ndarray
+    #: `x, y, width, height` of each building, shape `(n, 4)`
+    bboxes: np.ndarray
+    #: `x, y` centroid of each building, shape `(n, 2)`
+    centroids: np.ndarray
+    #: Building id of each polygon, shape `(len(polygons),)`
+    polygon_ids: np.ndarray
+
+
+def smooth_polygons(mask_np):
+    """Blur and threshold a probability (0-1) or 0-255 mask into a boolean mask."""
+    from cv2 import GaussianBlur, THRESH_BINARY, threshold
+
+    if mask_np.max() <= 1.0:
+        mask_np = (mask_np * 255).astype(np.uint8)
+    elif mask_np.dtype != np.uint8:
+        mask_np = mask_np.astype(np.uint8)
+
+    smoothed_mask = GaussianBlur(mask_np, (5, 5), 0)
+
+    _, smoothed_mask = threshold(smoothed_mask, 127, 1, THRESH_BINARY)
+
+    return smoothed_mask.view(bool)
+
+
+def building_stats(mask_np):
+    """
+    Label the buildings of a boolean mask in one connected-components pass.
+
+    Buildings are 8-connected.
+
+    :returns: Label image (`0` is background, building `i` is `i + 1`),
+        areas, bounding boxes and centroids
+    """
+    from cv2 import CC_STAT_AREA, CV_32S, connectedComponentsWithStats
+
+    _, labels, stats, centroids = connectedComponentsWithStats(
+        mask_np.view(np.uint8), connectivity=8, ltype=CV_32S
+    )
+    areas = stats[1:, CC_STAT_AREA].astype(np.int64)
+    return labels, areas, stats[1:, :4], centroids[1:]
+
+
+def predict_coverage(mask_np):
+    """Percentage of building pixels and number of separate buildings."""
+    _, areas, _, _ = building_stats(mask_np)
+    coverage_pct = areas.sum() / mask_np.size * 100
+    logger.info(f"Estimated building coverage: {coverage_pct:.2f}%")
+    logger.info(f"Estimated number of separate buildings: {len(areas)}")
+    return coverage_pct, len(areas)
+
+
+def trace_polygons(mask_np) -> list:
+    """Trace building contours as flat `[x1, y1, x2, y2, ...]` int32 arrays."""
+    from cv2 import CHAIN_APPROX_SIMPLE, RETR_LIST, findContours
+
+    contours, _ = findContours(mask_np.view(np.uint8), RETR_LIST, CHAIN_APPROX_SIMPLE)
+    return [contour.reshape(-1) for contour in contours]
+
+
+def postprocess_mask(prob_mask, simplify_tolerance: float = 1.0, regularize: bool = True) -> Detection:
+    """
+    Turn a building probability mask into polygons and building statistics.
+
+    Args:
+        prob_mask (np.ndarray): Building probabilities (0-1) or 0-255 mask.
+        simplify_tolerance (float): Maximum distance in pixels a dropped
+            vertex may lie from the simplified outline. `0` keeps the
+            traced int32 contours untouched.
+        regularize (bool): Snap outlines to their dominant orthogonal directions.
+    """
+    mask_np = smooth_polygons(prob_mask)
+    labels, areas, bboxes, centroids = building_stats(mask_np)
+    polygons = trace_polygons(mask_np)
+
+    # Contour points lie on the pixels of the building they outline.
+    first_points = np.array([p[:2] for p in polygons], dtype=np.intp).reshape(-1, 2)
+    polygon_ids = labels[first_points[:, 1], first_points[:, 0]] - 1
+    del labels
+
+    if simplify_tolerance > 0 or regularize:
+        polygons, (before, after) = refine_polygons(polygons, simplify_tolerance, regularize)
+        logger.info(
+            f"Polygon vertices reduced from {before} to {after}"
+            f" ({100 * (1 - after / max(before, 1)):.0f}% fewer)"
+        )
+
+    coverage_pct = areas.sum() / mask_np.size * 100
+    logger.info(f"Estimated building coverage: {coverage_pct:.2f}%")
+    logger.info(f"Estimated number of separate buildings: {len(areas)}")
+
+    return Detection(
+        polygons=polygons,
+        coverage_pct=float(coverage_pct),
+        num_features=len(areas),
+        mask=mask_np,
+        areas=areas,
+        bboxes=bboxes,
+        centroids=centroids,
+        polygon_ids=polygon_ids,
+    )
@@ -0,0 +1,205 @@
+"""Windowed access to raster images.
+
+`RasterSource` opens an image file once and serves arbitrary windows at
+arbitrary decimation as RGB uint8 arrays. Uncompressed TIFFs, whether
+stripped or tiled, are read through `numpy.memmap`, so only the pages
+under the requested window are touched and peak memory scales with the
+window, not the scene. Other files are decoded once on first read.
+
+A source also behaves like a read-only `(height, width, 3)` array for
+slicing, so the inference tiler cuts its windows from it directly.
+Sources are shared through `open_raster`, so the map view and the
+detection read the same file mapping.
+
+Usage Example:
+    source = open_raster("scene.tif")
+    window = source.read(0, 0, 1024, 1024)
+    overview = source.read(0, 0, source.width, source.height, step=16)
+    tile = source[256:512, 256:512]
+"""
+from collections import OrderedDict
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from utils.logger_config import logger
+
+# Large scenes are expected; lift PIL's decompression bomb guard.
+Image.MAX_IMAGE_PIXELS = None
+
+#: Raw TIFF layouts that can be mapped, with their number of channels
+MAPPABLE_MODES = {"L": 1, "RGB": 3, "RGBA": 4, "RGBX": 4}
+
+
+def _to_rgb(block: np.ndarray) -> np.ndarray:
+    """`(h, w, 3)` RGB pixels of a `(h, w, channels)` block."""
+    if block.shape[2] == 1:
+        return np.repeat(block, 3, axis=2)
+    return block[:, :, :3]
+
+
+class RasterSource:
+    """A read-only RGB raster read window by window."""
+
+    ndim = 3
+    dtype = np.dtype(np.uint8)
+
+    def __init__(self, path: str):
+        """
+        Open the image at `path` without decoding its pixels.
+
+        Args:
+            path (str): Image file. Raises `OSError` if it cannot be opened.
+        """
+        self.path = path
+        with Image.open(path) as img:
+            self.width, self.height = img.size
+            self._blocks = self._map_blocks(img)
+        self._lock = threading.Lock()
+        self._pixels: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.height, self.width, 3
+
+    @property
+    def is_memory_mapped(self) -> bool:
+        """Whether windows are read through `numpy.memmap`."""
+        return self._blocks is not None
+
+    def _map_blocks(self, img: Image.Image) -> Optional[list]:
+        """
+        Memory-map the uncompressed strips or tiles of a TIFF.
+
+        :returns: `(x0, y0, x1, y1, pixels)` of every block, or `None` when
+            the file has to be decoded
+        """
+        if img.format != "TIFF" or getattr(img, "n_frames", 1) > 1:
+            return None
+        blocks = []
+        mapping = None
+        for tile in img.tile:
+            codec, (x0, y0, x1, y1), offset, args = tile
+            rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+            if codec != "raw" or rawmode not in MAPPABLE_MODES or orientation != 1:
+                return None
+            channels = MAPPABLE_MODES[rawmode]
+            stride = stride or (x1 - x0) * channels
+            if mapping is None:
+                mapping = np.memmap(self.path, dtype=np.uint8, mode="r")
+            pixels = np.ndarray(
+                (y1 - y0, x1 - x0, channels),
+                dtype=np.uint8,
+                buffer=mapping,
+                offset=offset,
+                strides=(stride, channels, 1),
+            )
+            blocks.append((x0, y0, x1, y1, pixels))
+        return blocks or None
+
+    def _decoded(self) -> np.ndarray:
+        """All pixels of a file that cannot be mapped, decoded on first use."""
+        with self._lock:
+            if self._pixels is None:
+                logger.info(f"Decoding {self.path} in full; it is not an uncompressed TIFF.")
+                with Image.open(self.path) as img:
+                    self._pixels = np.asarray(img.convert("RGB"))
+            return self._pixels
+
+    def read_rows_columns(self, rows: range, columns: range) -> np.ndarray:
+        """RGB pixels at the given row and column indices, each an ascending `range`."""
+        out = np.empty((len(rows), len(columns), 3), dtype=np.uint8)
+        if not len(rows) or not len(columns):
+            return out
+        if self._blocks is None:
+            out[...] = self._decoded()[rows.start:rows.stop:rows.step, columns.start:columns.stop:columns.step]
+            return out
+
+        for x0, y0, x1, y1, pixels in self._blocks:
+            block_rows = _overlap(rows, y0, y1)
+            block_columns = _overlap(columns, x0, x1)
+            if block_rows is None or block_columns is None:
+                continue
+            (r0, r1, src_rows), (c0, c1, src_columns) = block_rows, block_columns
+            out[r0:r1, c0:c1] = _to_rgb(pixels[src_rows, src_columns])
+        return out
+
+    def read(self, x0: int, y0: int, x1: int, y1: int, step: int = 1) -> np.ndarray:
+        """
+        Read the window `[x0, x1) x [y0, y1)`, keeping every `step`-th pixel.
+
+        The window is clipped to the image.
+
+        Returns:
+            np.ndarray: `(ceil(h / step), ceil(w / step), 3)` uint8 pixels.
+        """
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        return self.read_rows_columns(range(y0, max(y0, y1), step), range(x0, max(x0, x1), step))
+
+    def __getitem__(self, key) -> np.ndarray:
+        """Numpy-style slicing by rows and columns, e.g. `source[y:y + 256, x:x + 256]`."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        rows, columns = (tuple(key) + (slice(None), slice(None)))[:2]
+        rest = key[2:]
+        if not isinstance(rows, slice) or not isinstance(columns, slice):
+            raise TypeError("RasterSource supports slices only.")
+        row_range = range(*rows.indices(self.height))
+        column_range = range(*columns.indices(self.width))
+        if row_range.step < 0 or column_range.step < 0:
+            raise ValueError("RasterSource does not support negative steps.")
+        window = self.read_rows_columns(row_range, column_range)
+        return window[(slice(None), slice(None)) + rest] if rest else window
+
+    def __array__(self, dtype=None, copy=None):
+        pixels = self[:, :]
+        return pixels if dtype is None else pixels.astype(dtype)
+
+
+def _overlap(indices: range, start: int, stop: int):
+    """
+    Positions of `indices` falling inside the block `[start, stop)`.
+
+    :returns: `(first, last)` positions in `indices` and the slice into the
+        block, or `None` when none falls inside
+    """
+    step = indices.step
+    first = max(0, -(-(start - indices.start) // step))
+    last = min(len(indices), -(-(stop - indices.start) // step))
+    if first >= last:
+        return None
+    block_start = indices.start + first * step - start
+    return first, last, slice(block_start, block_start + (last - first - 1) * step + 1, step)
+
+
+_sources: OrderedDict[tuple, RasterSource] = OrderedDict()
+_sources_lock = threading.Lock()
+MAX_OPEN_SOURCES = 4
+
+
+def open_raster(path: str) -> RasterSource:
+    """
+    Open `path` as a :class:`RasterSource`, sharing recently opened ones.
+
+    A file changed on disk since it was opened is opened again.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _sources_lock:
+        source = _sources.get(key)
+        if source is not None:
+            _sources.move_to_end(key)
+            return source
+
+    source = RasterSource(path)
+    with _sources_lock:
+        source = _sources.setdefault(key, source)
+        _sources.move_to_end(key)
+        while len(_sources) > MAX_OPEN_SOURCES:
+            _sources.popitem(last=False)
+    return source
@@ -0,0 +1,164 @@
+"""Registry of warm, loaded models.
+
+Loading a model unpickles the whole network and sets up the torch/fastai
+modules, which dominates the latency of a detection on small images.
+`ModelRegistry` keeps loaded models in memory keyed by file path and file
+fingerprint (mtime and size), so repeat detections reuse the same object,
+and evicts the least recently used ones once an entry or memory cap is hit.
+
+Usage Example:
+    registry = ModelRegistry(max_entries=2)
+    registry.preload("resources/model/building_segmentation.pkl")
+    model = registry.get("resources/model/building_segmentation.pkl")
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+import os
+import threading
+from typing import Any, Callable, Optional
+
+from utils.logger_config import logger
+from .backends import load_backend
+
+
+def model_nbytes(model) -> int:
+    """
+    Estimate the memory held by a loaded model.
+
+    Sums parameter and buffer sizes of the underlying `torch.nn.Module`.
+    Objects without one are counted as zero bytes.
+    """
+    module = getattr(model, "model", model)
+    if not hasattr(module, "parameters"):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def file_fingerprint(model_path: str) -> tuple[str, int, int]:
+    """Return `(absolute path, mtime in ns, size)` identifying a model file."""
+    path = os.path.abspath(model_path)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    """Thread-safe LRU cache of loaded models."""
+
+    def __init__(
+        self,
+        max_entries: int = 2,
+        max_bytes: Optional[int] = 2 * 1024**3,
+        loader: Callable[[str], Any] = load_backend,
+    ):
+        """
+        Args:
+            max_entries (int): Maximum number of models kept in memory.
+            max_bytes (int or None): Memory cap for all cached models.
+                `None` disables the cap.
+            loader (callable): Function loading a model from a file path.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._models: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._pending: dict[tuple, Future] = {}
+
+    def get(self, model_path: str):
+        """
+        Return the model stored at `model_path`, loading it if needed.
+
+        A file that changed on disk since it was cached is loaded again.
+        Concurrent requests for the same file share a single load.
+        """
+        key = file_fingerprint(model_path)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                logger.debug(f"Model cache hit: {key[0]}")
+                return self._models[key][0]
+
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            logger.info(f"Loading model: {key[0]}")
+            model = self.loader(key[0])
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            self._drop_stale(key)
+            self._models[key] = (model, model_nbytes(model))
+            self._evict()
+        future.set_result(model)
+        return model
+
+    def preload(self, model_path: str) -> threading.Thread:
+        """Load `model_path` into the registry on a background thread."""
+
+        def run():
+            try:
+                self.get(model_path)
+                logger.info(f"Model preloaded: {model_path}")
+            except Exception as e:
+                logger.warning(f"Model preloading failed for {model_path}: {e}")
+
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        """Drop all cached models."""
+        with self._lock:
+            self._models.clear()
+
+    def __contains__(self, model_path: str) -> bool:
+        try:
+            key = file_fingerprint(model_path)
+        except OSError:
+            return False
+        with self._lock:
+            return key in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory held by cached models."""
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def _drop_stale(self, key: tuple):
+        """Forget older versions of the same file."""
+        for cached in [k for k in self._models if k[0] == key[0] and k != key]:
+            del self._models[cached]
+
+    def _evict(self):
+        """Evict least recently used models above the entry or memory cap.
+        The most recently loaded model is always kept."""
+        while len(self._models) > 1:
+            total = sum(size for _, size in self._models.values())
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            if len(self._models) <= self.max_entries and not over_bytes:
+                break
+            evicted, _ = self._models.popitem(last=False)
+            logger.info(f"Evicted model from cache: {evicted[0]}")
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,187 @@
+"""Sliding-window inference over full-resolution images.
+
+The image is cut into overlapping model-sized windows that are predicted
+in batches. Per-tile probabilities are blended back into one
+full-resolution mask using a separable taper, so seams between tiles
+disappear and the only scene-sized buffer is the output itself.
+
+Usage Example:
+    probabilities = predict_tiled(image, predict_batch, tile_size=256, overlap=32)
+"""
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+
+class DetectionCancelled(Exception):
+    """Raised when a running detection is cancelled between batches."""
+
+
+def tile_offsets(length: int, tile_size: int, overlap: int) -> np.ndarray:
+    """
+    Start offsets of windows covering `length` pixels along one axis.
+
+    The last window is aligned with the end of the axis, so every window
+    lies fully inside the image unless the image is smaller than a tile.
+    """
+    if overlap < 0 or overlap >= tile_size:
+        raise ValueError(f"Overlap must be in [0, {tile_size}), got {overlap}.")
+    if length <= tile_size:
+        return np.zeros(1, dtype=int)
+    stride = tile_size - overlap
+    offsets = np.arange(0, length - tile_size, stride)
+    return np.append(offsets, length - tile_size)
+
+
+def tile_windows(height: int, width: int, tile_size: int, overlap: int) -> list[tuple[int, int]]:
+    """`(y, x)` offsets of all windows covering a `height` x `width` image."""
+    ys = tile_offsets(height, tile_size, overlap)
+    xs = tile_offsets(width, tile_size, overlap)
+    return [(int(y), int(x)) for y in ys for x in xs]
+
+
+def taper(tile_size: int, overlap: int) -> np.ndarray:
+    """1D blending weights: a linear ramp over `overlap` pixels on each side."""
+    weights = np.ones(tile_size, dtype=np.float32)
+    if overlap > 0:
+        ramp = np.arange(1, overlap + 1, dtype=np.float32) / (overlap + 1)
+        weights[:overlap] = ramp
+        weights[-overlap:] = np.minimum(weights[-overlap:], ramp[::-1])
+    return weights
+
+
+def _weight_sum(length: int, offsets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    total = np.zeros(length, dtype=np.float32)
+    for offset in offsets:
+        size = min(len(weights), length - offset)
+        total[offset:offset + size] += weights[:size]
+    return total
+
+
+def cut_tile(image: np.ndarray, y: int, x: int, tile_size: int) -> np.ndarray:
+    """
+    Window of `image` starting at `(y, x)`.
+
+    Windows extending past the image border (images smaller than a tile)
+    are filled by mirroring the image.
+    """
+    window = image[y:y + tile_size, x:x + tile_size]
+    pad_y, pad_x = tile_size - window.shape[0], tile_size - window.shape[1]
+    if pad_y or pad_x:
+        padding = [(0, pad_y), (0, pad_x)] + [(0, 0)] * (image.ndim - 2)
+        window = np.pad(window, padding, mode="symmetric")
+    return window
+
+
+def iter_tile_batches(
+    image: np.ndarray, tile_size: int, overlap: int, batch_size: int
+) -> Iterator[tuple[np.ndarray, list[tuple[int, int]]]]:
+    """
+    Yield `(tiles, offsets)` batches of windows cut from `image`.
+
+    `tiles` has shape `(n, tile_size, tile_size, channels)`.
+    """
+    windows = tile_windows(image.shape[0], image.shape[1], tile_size, overlap)
+
+    buffer = np.empty((batch_size, tile_size, tile_size) + image.shape[2:], dtype=image.dtype)
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        for i, (y, x) in enumerate(batch):
+            buffer[i] = cut_tile(image, y, x, tile_size)
+        yield buffer[:len(batch)], batch
+
+
+class TileBlender:
+    """
+    Accumulates per-window probabilities into a full-resolution mask.
+
+    Usage Example:
+        blender = TileBlender((height, width), tile_size=256, overlap=32)
+        blender.add(probability, y, x)
+        mask = blender.result()
+    """
+
+    def __init__(self, shape: tuple[int, int], tile_size: int, overlap: int, out: Optional[np.ndarray] = None):
+        """
+        Args:
+            shape (tuple): `(height, width)` of the blended mask.
+            tile_size (int): Side of the square windows.
+            overlap (int): Number of pixels shared by neighbouring windows.
+            out (np.ndarray): Optional float32 buffer of `shape` to
+                accumulate into, e.g. a `numpy.memmap` for very large scenes.
+        """
+        self.shape = shape
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.weights = taper(tile_size, overlap)
+        self._weights_2d = np.outer(self.weights, self.weights)
+
+        if out is None:
+            out = np.zeros(shape, dtype=np.float32)
+        else:
+            out[...] = 0
+        self.out = out
+
+    def add(self, probability: np.ndarray, y: int, x: int):
+        """Blend the `tile_size` square `probability` of the window at `(y, x)`."""
+        height, width = self.shape
+        h, w = min(self.tile_size, height - y), min(self.tile_size, width - x)
+        self.out[y:y + h, x:x + w] += probability[:h, :w] * self._weights_2d[:h, :w]
+
+    def add_batch(self, probabilities: Iterable[np.ndarray], offsets: Iterable[tuple[int, int]]):
+        for probability, (y, x) in zip(probabilities, offsets):
+            self.add(probability, y, x)
+
+    def result(self) -> np.ndarray:
+        """Normalize the accumulated probabilities once all windows were added."""
+        # The window grid and the blending weights are both separable, so the
+        # total weight at each pixel is the outer product of two 1D sums.
+        height, width = self.shape
+        self.out /= _weight_sum(height, tile_offsets(height, self.tile_size, self.overlap), self.weights)[:, None]
+        self.out /= _weight_sum(width, tile_offsets(width, self.tile_size, self.overlap), self.weights)[None, :]
+        return self.out
+
+
+def predict_tiled(
+    image: np.ndarray,
+    predict_batch: Callable[[np.ndarray], np.ndarray],
+    tile_size: int = 256,
+    overlap: int = 32,
+    batch_size: int = 8,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    out: Optional[np.ndarray] = None,
+    cancel_event=None,
+) -> np.ndarray:
+    """
+    Predict a full-resolution probability mask for `image`.
+
+    Args:
+        image (np.ndarray): Image of shape `(height, width, channels)`.
+        predict_batch (callable): Maps a batch of tiles of shape
+            `(n, tile_size, tile_size, channels)` to probabilities of shape
+            `(n, tile_size, tile_size)`.
+        tile_size (int): Side of the square model input window.
+        overlap (int): Number of pixels shared by neighbouring windows.
+        batch_size (int): Number of windows predicted at once.
+        progress_callback (callable): Called with the fraction of windows done.
+        out (np.ndarray): Optional `(height, width)` float32 buffer to
+            accumulate into, e.g. a `numpy.memmap` for very large scenes.
+        cancel_event (threading.Event): Checked before every batch; once set,
+            :class:`DetectionCancelled` is raised.
+
+    Returns:
+        np.ndarray: Blended probabilities of shape `(height, width)`.
+    """
+    blender = TileBlender(image.shape[:2], tile_size, overlap, out=out)
+    num_windows = len(tile_windows(image.shape[0], image.shape[1], tile_size, overlap))
+
+    done = 0
+    for tiles, offsets in iter_tile_batches(image, tile_size, overlap, batch_size):
+        if cancel_event is not None and cancel_event.is_set():
+            raise DetectionCancelled()
+        blender.add_batch(predict_batch(tiles), offsets)
+        done += len(offsets)
+        if progress_callback:
+            progress_callback(done / num_windows)
+
+    return blender.result()
@@ -1,17 +1,15 @@
 """This module contains helper functions for the application.
-It includes functions to manage graphics items, reorder layers, and display dialog boxes."""
+It includes functions to manage graphics items and display dialog boxes.
+Layer ordering lives in `layer_stack`."""
 import os
-from operator import itemgetter
 from pathlib import Path
 import sys
-from typing import Literal
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QFileDialog,
     QGraphicsPixmapItem,
     QGraphicsPolygonItem,
-    QListWidgetItem,
     QMessageBox,
 )
 
@@ -30,54 +28,6 @@ def unwrap_item(data: dict) -> QGraphicsPixmapItem | QGraphicsPolygonItem:
     return item
 
 
-def get_next_z(self) -> int:
-    """
-    Determine the next highest Z-value to assign a new graphics item.
-
-    Returns:
-        int: One greater than the current maximum Z-value in the scene.
-    """
-    return max((i.zValue() for i in self.scene.items()), default=-1) + 1
-
-
-def reorder_list_by_z(layer_list):
-    """
-    Reorders the layer list to match the Z-order of items in the scene.
-    """
-    items_data = []
-    for i in range(layer_list.count()):
-        list_item = layer_list.item(i)
-        data = list_item.data(Qt.ItemDataRole.UserRole)
-        graphics_item = unwrap_item(data)
-        if data:
-            items_data.append(
-                (graphics_item.zValue(), list_item.text(), list_item, data)
-            )
-
-    items_data.sort(reverse=True, key=itemgetter(0))
-
-    for new_z, (_, _, list_item, data) in enumerate(reversed(items_data)):
-        if isinstance(data, dict):
-            data["item"].setZValue(new_z)
-        else:
-            data.setZValue(new_z)
-
-    items_data.sort(
-        reverse=True,
-        key=lambda t: (
-            t[2].data(Qt.ItemDataRole.UserRole)["item"].zValue()
-            if isinstance(t[3], dict)
-            else t[2].data(Qt.ItemDataRole.UserRole).zValue()
-        ),
-    )
-
-    layer_list.clear()
-    for _, label, _, data in items_data:
-        new_item = QListWidgetItem(label)
-        new_item.setData(Qt.ItemDataRole.UserRole, data)
-        layer_list.addItem(new_item)
-
-
 def show_dialog_box(
     self,
     window_title="None",
@@ -203,34 +153,3 @@ def get_file(self, initial_dir, filters, callback=None):
             pass
         return
     return file_path
-
-
-def move_layer(scene, layer_list, direction: Literal["up", "down"]):
-    """Move the selected layer up or down in Z-order."""
-    from utils.logger_config import logger
-
-    current = layer_list.currentItem()
-    if not current:
-        logger.warning(f"Move {direction} requested, but no layer is selected.")
-        return
-
-    layer = current.data(Qt.ItemDataRole.UserRole)
-    item = unwrap_item(layer)
-    if not item:
-        return
-
-    items = sorted(scene.items(), key=lambda i: i.zValue())
-    index = items.index(item)
-
-    if direction == "up" and index < len(items) - 1:
-        target_item = items[index + 1]
-    elif direction == "down" and index > 0:
-        target_item = items[index - 1]
-    else:
-        return
-
-    z1, z2 = item.zValue(), target_item.zValue()
-    item.setZValue(z2)
-    target_item.setZValue(z1)
-    reorder_list_by_z(layer_list)
-
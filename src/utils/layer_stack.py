@@ -0,0 +1,99 @@
+"""
+Layer stack of the map.
+
+The rows of the contents pane's `QListWidget` are the layer order, topmost
+first, and `LayerStack` keeps the z-values of the scene items consistent
+with it. Adding a layer puts it on top with the z-value above the current
+top row, moving swaps two neighbouring rows and their z-values, and
+deleting takes a single row. None of them scans the scene or rebuilds the
+list, so they cost O(layers) at most whatever the layers contain.
+
+Classes:
+    - LayerStack
+
+Usage Example:
+    layers = LayerStack(layer_list, scene)
+    layers.add("Image: scene.tif", {"item": pixmap_item, "layer_type": "image"})
+    layers.move(layer_list.currentItem(), "up")
+"""
+from typing import Literal, Optional
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsScene, QListWidget, QListWidgetItem
+
+from .helpers import unwrap_item
+
+
+class LayerStack:
+    """Keeps scene z-values in the order of a layer `QListWidget`."""
+
+    def __init__(self, layer_list: QListWidget, scene: QGraphicsScene):
+        """
+        Args:
+            layer_list (`QListWidget`): Layer rows, topmost first. Each row
+                holds its layer metadata (or the bare item) under `Qt.UserRole`.
+            scene (`QGraphicsScene`): The scene the layer items are drawn in.
+        """
+        self.layer_list = layer_list
+        self.scene = scene
+
+    def __len__(self) -> int:
+        return self.layer_list.count()
+
+    def graphics_item(self, row: int) -> Optional[QGraphicsItem]:
+        """Scene item of the layer at `row`."""
+        list_item = self.layer_list.item(row)
+        return unwrap_item(list_item.data(Qt.ItemDataRole.UserRole)) if list_item else None
+
+    def next_z(self) -> float:
+        """Z-value placing a new layer above every existing one."""
+        top = self.graphics_item(0)
+        return top.zValue() + 1 if top is not None else 0
+
+    def add(self, label: str, layer_metadata: dict) -> QListWidgetItem:
+        """
+        Put the layer described by `layer_metadata` on top of the stack.
+
+        Its `"item"` is added to the scene if it is not there yet.
+        """
+        item = layer_metadata["item"]
+        item.setZValue(self.next_z())
+        if item.scene() is None:
+            self.scene.addItem(item)
+
+        list_item = QListWidgetItem(label)
+        list_item.setData(Qt.ItemDataRole.UserRole, layer_metadata)
+        self.layer_list.insertItem(0, list_item)
+        return list_item
+
+    def move(self, list_item: QListWidgetItem, direction: Literal["up", "down"]) -> bool:
+        """
+        Swap a layer with its neighbour above or below.
+
+        :returns: `False` if the layer is already at that end of the stack
+        """
+        row = self.layer_list.row(list_item)
+        target = row - 1 if direction == "up" else row + 1
+        if row < 0 or not 0 <= target < len(self):
+            return False
+
+        item, other = self.graphics_item(row), self.graphics_item(target)
+        if item is not None and other is not None:
+            z, other_z = item.zValue(), other.zValue()
+            if z == other_z:
+                # Layers added without the stack may share a z-value.
+                z, other_z = (other_z - 1, other_z) if direction == "up" else (other_z + 1, other_z)
+            item.setZValue(other_z)
+            other.setZValue(z)
+
+        self.layer_list.takeItem(row)
+        self.layer_list.insertItem(target, list_item)
+        self.layer_list.setCurrentItem(list_item)
+        return True
+
+    def remove(self, list_item: QListWidgetItem):
+        """Remove a layer from the scene and the stack."""
+        item = unwrap_item(list_item.data(Qt.ItemDataRole.UserRole))
+        if item is not None and item.scene() is self.scene:
+            self.scene.removeItem(item)
+        self.layer_list.takeItem(self.layer_list.row(list_item))
@@ -0,0 +1,197 @@
+"""
+Define the PolygonLayer class, a single QGraphicsItem drawing many polygons.
+
+All vertices live in one contiguous coordinate array with an offsets array
+marking where each polygon starts, alongside per-polygon bounding boxes and
+colors. Painting only touches the polygons whose bounding box intersects
+the exposed rectangle, so a layer of 100k buildings is one scene item and
+panning costs as much as the buildings on screen. Zoomed far out,
+buildings smaller than a couple of pixels are drawn as points.
+
+Each layer carries a `GridIndex` over the bounding boxes, used to pick the
+building under the cursor and to select buildings in a rectangle.
+
+Classes:
+    - PolygonLayer: Extends QGraphicsItem
+
+Usage Example:
+    layer = PolygonLayer(detection.polygons)
+    scene.addItem(layer)
+"""
+from typing import Optional
+
+import numpy as np
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem, QWidget
+
+from object_detection.geometry import pack_polygons
+from .spatial_index import GridIndex, points_in_polygon
+
+PEN_WIDTH = 2
+FILL_ALPHA = int(0.4 * 255)
+MIN_PIXELS = 3
+SELECTION_COLOR = QColor(255, 255, 0)
+
+
+def to_qpolygon(coords: np.ndarray) -> QPolygonF:
+    """Build a `QPolygonF` from `(n, 2)` coordinates by copying into its buffer."""
+    polygon = QPolygonF()
+    polygon.resize(len(coords))
+    buffer = polygon.data()
+    buffer.setsize(len(coords) * 2 * 8)
+    np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)[:] = coords
+    return polygon
+
+
+def random_colors(count: int, rng=None) -> np.ndarray:
+    """Light random `(r, g, b)` colors, one row per polygon."""
+    rng = rng or np.random.default_rng()
+    return ((rng.random((count, 3)) * 0.6 + 0.4) * 255).astype(np.uint8)
+
+
+def polygon_areas(coords: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Shoelace area of every packed polygon."""
+    if not len(coords):
+        return np.empty(0)
+    counts = np.diff(offsets)
+    nxt = np.arange(1, len(coords) + 1)
+    nxt[offsets[1:] - 1] = offsets[:-1]
+    cross = coords[:, 0] * coords[nxt, 1] - coords[nxt, 0] * coords[:, 1]
+    return np.abs(np.add.reduceat(cross, offsets[:-1])) / 2 * (counts > 0)
+
+
+class PolygonLayer(QGraphicsItem):
+    """A layer of filled polygons stored in packed numpy arrays."""
+
+    def __init__(
+        self,
+        polygons,
+        colors: np.ndarray = None,
+        building_ids: np.ndarray = None,
+        areas: np.ndarray = None,
+        parent: QGraphicsItem = None,
+    ):
+        """
+        Initialize the polygon layer.
+
+        Args:
+            polygons (list): Flat `[x1, y1, x2, y2, ...]` polygons. Polygons
+                with fewer than 3 vertices are skipped.
+            colors (`np.ndarray`): `(n, 3)` uint8 colors of the kept polygons.
+                Random light colors by default.
+            building_ids (`np.ndarray`): Building id of each of `polygons`.
+                Defaults to the polygon's position in `polygons`.
+            areas (`np.ndarray`): Area of each of `polygons`. Defaults to
+                the polygon's own area.
+            parent (`QGraphicsItem`): The parent item, if any.
+        """
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+        #: Index of each kept polygon in `polygons`
+        lengths = np.fromiter(map(len, polygons), dtype=np.int64, count=len(polygons))
+        self.source_ids = np.flatnonzero(lengths >= 6)
+        if len(self.source_ids) < len(polygons):
+            polygons = [polygons[i] for i in self.source_ids]
+        self.coords, self.offsets = pack_polygons(polygons)
+        self.colors = random_colors(len(self)) if colors is None else np.asarray(colors, dtype=np.uint8)
+
+        #: `min x, min y, max x, max y` of each polygon, in item coordinates
+        self.bboxes = np.empty((len(self), 4), dtype=np.float64)
+        if len(self):
+            starts = self.offsets[:-1]
+            self.bboxes[:, :2] = np.minimum.reduceat(self.coords, starts)
+            self.bboxes[:, 2:] = np.maximum.reduceat(self.coords, starts)
+            x0, y0 = self.bboxes[:, :2].min(axis=0)
+            x1, y1 = self.bboxes[:, 2:].max(axis=0)
+            margin = PEN_WIDTH / 2
+            self._bounding_rect = QRectF(x0 - margin, y0 - margin, x1 - x0 + 2 * margin, y1 - y0 + 2 * margin)
+        else:
+            self._bounding_rect = QRectF()
+
+        self.building_ids = self.source_ids if building_ids is None else np.asarray(building_ids)[self.source_ids]
+        self.areas = polygon_areas(self.coords, self.offsets) if areas is None else np.asarray(areas)[self.source_ids]
+        self.index = GridIndex(self.bboxes)
+        #: Indices of the selected polygons
+        self.selection = np.empty(0, dtype=np.int64)
+
+        # QPolygonF, pen and brush of a polygon are built on first paint and reused on later ones.
+        self._painted: list = [None] * len(self)
+        r, g, b = self.colors.mean(axis=0).astype(int).tolist() if len(self) else (255, 255, 255)
+        self._point_pen = QPen(QColor(r, g, b), 0)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def polygon(self, index: int) -> np.ndarray:
+        """`(n, 2)` vertices of polygon `index`."""
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def visible_indices(self, rect: QRectF) -> np.ndarray:
+        """Indices of the polygons whose bounding box intersects `rect`."""
+        b = self.bboxes
+        return np.flatnonzero(
+            (b[:, 2] >= rect.left()) & (b[:, 0] <= rect.right())
+            & (b[:, 3] >= rect.top()) & (b[:, 1] <= rect.bottom())
+        )
+
+    def pick(self, point: QPointF) -> Optional[int]:
+        """Index of the topmost polygon containing `point` (item coordinates), if any."""
+        candidates = self.index.query_point(point.x(), point.y())
+        inside = points_in_polygon(point.x(), point.y(), self.coords, self.offsets, candidates)
+        return int(inside.max()) if len(inside) else None
+
+    def query_rect(self, rect: QRectF) -> np.ndarray:
+        """Indices of the polygons whose bounding box intersects `rect` (item coordinates)."""
+        return self.index.query_rect(rect.left(), rect.top(), rect.right(), rect.bottom())
+
+    def set_selection(self, indices):
+        """Highlight the polygons at `indices`."""
+        self.selection = np.unique(np.asarray(indices, dtype=np.int64))
+        self.update()
+
+    def describe(self, index: int) -> str:
+        """Tooltip text of polygon `index`."""
+        return f"Building {self.building_ids[index]}\nArea: {self.areas[index]:.0f} px"
+
+    def boundingRect(self) -> QRectF:
+        return self._bounding_rect
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget = None):
+        """
+        Draw the polygons intersecting the exposed rectangle.
+
+        Polygons smaller than `MIN_PIXELS` on screen are drawn as single
+        points in one call.
+        """
+        visible = self.visible_indices(option.exposedRect)
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        extent = self.bboxes[visible, 2:] - self.bboxes[visible, :2]
+        tiny = extent.max(axis=1) * lod < MIN_PIXELS
+
+        if tiny.any():
+            centers = (self.bboxes[visible[tiny], :2] + self.bboxes[visible[tiny], 2:]) / 2
+            painter.setPen(self._point_pen)
+            painter.drawPoints(to_qpolygon(centers))
+
+        for i in visible[~tiny]:
+            painted = self._painted[i]
+            if painted is None:
+                r, g, b = self.colors[i].tolist()
+                painted = self._painted[i] = (
+                    to_qpolygon(self.polygon(i)),
+                    QPen(QColor(r, g, b), PEN_WIDTH),
+                    QColor(r, g, b, FILL_ALPHA),
+                )
+            qpolygon, pen, brush = painted
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            painter.drawPolygon(qpolygon)
+
+        selected = np.intersect1d(self.selection, visible, assume_unique=True)
+        if len(selected):
+            painter.setPen(QPen(SELECTION_COLOR, 0))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            for i in selected:
+                painter.drawPolygon(to_qpolygon(self.polygon(i)))
@@ -1,21 +1,21 @@
 import os
-from random import random
 from typing import Optional
 
 from PyQt6.QtWidgets import (
-    QGraphicsItemGroup,
     QGraphicsPixmapItem,
-    QGraphicsPolygonItem,
-    QListWidgetItem,
     QMessageBox,
     QWidget,
 )
-from PyQt6.QtGui import QAction, QColor, QPen, QPixmap, QPolygonF
-from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QAction
+from PyQt6.QtCore import Qt, QThreadPool
 
 from . import helpers as hp
-from object_detection.object_detection import label_func, get_model, predict_polygons
+from .layer_stack import LayerStack
+from .polygon_layer import PolygonLayer
+from .tile_pyramid import TiledImageLayer, TilePyramid
+from object_detection.object_detection import label_func
 from utils.logger_config import logger
+from utils.workers import DetectionWorker
 
 
 class ApplicationService:
@@ -24,58 +24,64 @@ class ApplicationService:
 
         self.scene = parent_widget.scene
         self.layer_list = parent_widget.contents_pane.layer_list
+        self.layers = LayerStack(self.layer_list, self.scene)
         self.view = parent_widget.map_pane
         self.scene_width = parent_widget.scene_width
         self.scene_height = parent_widget.scene_height
 
+        self.thread_pool = QThreadPool.globalInstance()
+        self.detection_worker: Optional[DetectionWorker] = None
+
     def add_image(self):
-        """Slot. Select an image from a file dialog and add it to the `QGraphicsScene`."""
+        """
+        Slot. Select an image from a file dialog and add it to the `QGraphicsScene`.
+
+        The image is shown as a preview fitted to the scene, sharpened with
+        tiles of a :class:`TilePyramid` when zooming in.
+        """
         initial_dir = hp.get_resource_path("resources/demo_images")
         filters = "Images (*.png *.jpg *.jpeg *.tif *.tiff);; All files (*.*)"
         file_path = hp.get_file(self, initial_dir, filters, self.add_image)
 
-        pixmap = QPixmap(file_path)
-        if pixmap.isNull():
+        if not file_path:
+            return
+        try:
+            pyramid = TilePyramid(file_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not open image {file_path}: {e}")
             return
 
-        scaled_pixmap = pixmap.scaled(
-            self.scene_width,
-            self.scene_height,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-
-        graphics_pixmap = QGraphicsPixmapItem(scaled_pixmap)
+        graphics_pixmap = TiledImageLayer(pyramid, (self.scene_width, self.scene_height))
         graphics_pixmap.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
         graphics_pixmap.setPos(
-            (self.scene_width - scaled_pixmap.width()) / 2,
-            (self.scene_height - scaled_pixmap.height()) / 2,
+            (self.scene_width - graphics_pixmap.pixmap().width()) / 2,
+            (self.scene_height - graphics_pixmap.pixmap().height()) / 2,
         )
 
-        graphics_pixmap.setZValue(hp.get_next_z(self.parent))
         graphics_pixmap.setFlag(QGraphicsPixmapItem.GraphicsItemFlag.ItemIsSelectable)
-        self.scene.addItem(graphics_pixmap)
 
-        list_item = QListWidgetItem(f"Image: {os.path.basename(file_path)}")
         layer_metadata = {
             "item": graphics_pixmap,
             "file_path": file_path,
             "layer_type": "image",
             "extra": {},
         }
-        list_item.setData(Qt.ItemDataRole.UserRole, layer_metadata)
-        self.layer_list.addItem(list_item)
-        hp.reorder_list_by_z(self.layer_list)
+        self.layers.add(f"Image: {os.path.basename(file_path)}", layer_metadata)
         self.view.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
         logger.info(f"Image {layer_metadata.get('file_path')} added to the scene.")
 
-    def add_polygon_layer(self, polygons_data):
+    def add_polygon_layer(self, polygons_data, mask_shape=None, building_ids=None, areas=None):
         """
         Display the specified annotations, scaling them to match the current image size.
         :param anns (array of object): annotations to display
         :return: None
         Add a polygon layer from a list of flat coordinate lists.
         :param polygons_data: List of polygons, where each is [x1, y1, x2, y2, ...]
+        :param mask_shape: `(height, width)` of the mask the polygons were traced
+            from. If omitted, the polygons' bounding box is fitted to the image.
+        :param building_ids: Building id of each polygon, shown on hover.
+        :param areas: Area of each polygon's building, shown on hover.
+        All polygons go into one :class:`PolygonLayer` item.
         Adapted from pycocotools coco.py line 228 (.showAnns(self, anns)).
         """
         image_item = hp.get_image_item(self.layer_list)
@@ -92,66 +98,52 @@ class ApplicationService:
         image_width = image_item.pixmap().width()
         image_height = image_item.pixmap().height()
 
-        items = []
-
-        for coords in polygons_data:
-            if len(coords) < 6:
-                continue
-
-            points = [QPointF(coords[i], coords[i + 1]) for i in range(0, len(coords), 2)]
-            polygon_item = QGraphicsPolygonItem(QPolygonF(points))
-
-            r, g, b = [int((random() * 0.6 + 0.4) * 255) for _ in range(3)]
-            polygon_item.setBrush(Qt.GlobalColor.transparent)
-            polygon_item.setPen(QPen(QColor(r, g, b), 2))
-            polygon_item.setBrush(QColor(r, g, b, int(0.4 * 255)))
-
-            items.append(polygon_item)
-
-        if not items:
+        layer = PolygonLayer(polygons_data, building_ids=building_ids, areas=areas)
+        if not len(layer):
             return
 
-        group = self.scene.createItemGroup(items)
-        next_z = max((i.zValue() for i in self.scene.items()), default=-1) + 1
-        group.setZValue(next_z)
-
-        rect = group.boundingRect()
+        if mask_shape is not None:
+            mask_height, mask_width = mask_shape
+        else:
+            rect = layer.boundingRect()
+            mask_height, mask_width = rect.height(), rect.width()
 
-        scale_x = image_width / rect.width()
-        scale_y = image_height / rect.height()
+        scale_x = image_width / mask_width
+        scale_y = image_height / mask_height
 
         scale = min(scale_x, scale_y)
 
-        group.setScale(scale)
+        layer.setScale(scale)
 
         image_x = image_item.x()
         image_y = image_item.y()
 
-        group.setPos(image_x, image_y)
+        layer.setPos(image_x, image_y)
 
-        group.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
-        group.setFlag(QGraphicsItemGroup.GraphicsItemFlag.ItemIsSelectable)
+        layer.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+        layer.setFlag(PolygonLayer.GraphicsItemFlag.ItemIsSelectable)
 
-        list_item = QListWidgetItem("Polygons Layer")
         layer_metadata = {
-            "item": group,
+            "item": layer,
             "layer_type": "polygon",
             "extra": {},
         }
-        list_item.setData(Qt.ItemDataRole.UserRole, layer_metadata)
-        self.layer_list.addItem(list_item)
-        hp.reorder_list_by_z(self.layer_list)
+        self.layers.add("Polygons Layer", layer_metadata)
 
     def detect(self):
         """
         Run object detection on the currently selected image.
 
-        Loads a detection model, predicts polygons on the image,
-        displays a success dialog, and adds the polygon layer to the scene.
+        Loads a detection model and predicts polygons on the image in a
+        background :class:`DetectionWorker`, so the window stays responsive.
+        The result is handled by `on_detection_result` on the GUI thread.
         """
+        if self.detection_worker is not None:
+            logger.warning("Detect requested, but a detection is already running.")
+            return
+
         logger.info("Starting object detection.")
         progress_bar = self.parent.contents_pane.progress_bar
-        progress_bar.setVisible(True)
 
         img_path = hp.get_image_path(self.layer_list)
         if not img_path:
@@ -162,66 +154,95 @@ class ApplicationService:
                 button=QMessageBox.StandardButton.Discard,
                 icon=QMessageBox.Icon.Critical,
             )
-            progress_bar.setVisible(False)
             return
 
         initial_dir = hp.get_resource_path("resources/model")
-        filters = "Deep Learning Models (*.pkl)"
+        filters = "Deep Learning Models (*.pkl *.pt)"
         model_path = hp.get_file(self, initial_dir, filters, self.detect)
         if model_path is None:
             return
-        
-        model = get_model(model_path)
 
-        progress_bar.setValue(30)
+        worker = DetectionWorker(img_path, model_path)
+        worker.signals.progress.connect(progress_bar.setValue)
+        worker.signals.result.connect(self.on_detection_result)
+        worker.signals.error.connect(self.on_detection_error)
+        worker.signals.cancelled.connect(self.on_detection_cancelled)
+        worker.signals.finished.connect(self.on_detection_finished)
+        self.detection_worker = worker
 
-        try:
-            logger.info("Starting predicting...")
-            polygons, coverage_pct, num_features = predict_polygons(img_path, model, progress_callback=lambda x: progress_bar.setValue(x))
-            progress_bar.setValue(80)
-            self.add_polygon_layer(polygons)
+        progress_bar.setValue(0)
+        progress_bar.setVisible(True)
+        self.parent.contents_pane.set_detection_running(True)
+        logger.info("Starting predicting...")
+        self.thread_pool.start(worker)
+
+    def cancel_detection(self):
+        """Slot. Stop the running detection before its next batch."""
+        if self.detection_worker is not None:
+            logger.info("Cancelling detection...")
+            self.detection_worker.cancel()
+
+    def on_detection_result(self, result):
+        """Slot. Add the detected polygons to the scene and report statistics."""
+        self.parent.contents_pane.progress_bar.setValue(95)
+        self.add_polygon_layer(
+            result.polygons,
+            result.mask.shape,
+            building_ids=result.polygon_ids,
+            areas=result.areas[result.polygon_ids],
+        )
+        coverage_pct, num_features = result.coverage_pct, result.num_features
+
+        self.parent.contents_pane.progress_bar.setValue(100)
+        logger.info("Successfully finished predicting...")
+        hp.show_dialog_box(self.parent, "Success", f"The object detection is finished.\nEstimated building coverage: {coverage_pct:.2f}%\nEstimated number of separate buildings: {num_features}")
+
+    def on_detection_error(self, message: str):
+        """Slot. Report a failed detection."""
+        hp.show_dialog_box(
+            self.parent,
+            window_title="Error",
+            text=f"An error occurred during detection: {message}",
+            button=QMessageBox.StandardButton.Discard,
+            icon=QMessageBox.Icon.Critical,
+        )
 
-            progress_bar.setValue(100)
-            logger.info("Successfully finished predicting...")
-            hp.show_dialog_box(self.parent, "Success", f"The object detection is finished.\nEstimated building coverage: {coverage_pct:.2f}%\nEstimated number of separate buildings: {num_features}")
+    def on_detection_cancelled(self):
+        """Slot. Hide the progress of a cancelled detection."""
+        self.parent.contents_pane.progress_bar.setVisible(False)
 
-        except Exception as e:
-            logger.exception(f"Detection failed: {str(e)}")
-            hp.show_dialog_box(
-                self.parent,
-                window_title="Error",
-                text=f"An error occurred during detection: {str(e)}",
-                button=QMessageBox.StandardButton.Discard,
-                icon=QMessageBox.Icon.Critical,
-            )
-            progress_bar.setVisible(False)
-            return
+    def on_detection_finished(self):
+        """Slot. Re-enable the detection controls."""
+        self.detection_worker = None
+        self.parent.contents_pane.set_detection_running(False)
 
     def up(self):
         """Move the currently selected layer up in Z-order."""
-        hp.move_layer(self.scene, self.layer_list, direction="up")
-        logger.debug("Moved layer up in Z-order.")
+        self._move_layer("up")
 
     def down(self):
         """Move the currently selected layer down in Z-order."""
-        hp.move_layer(self.scene, self.layer_list, "down")
-        logger.debug("Moved layer down in Z-order.")
+        self._move_layer("down")
+
+    def _move_layer(self, direction):
+        current = self.layer_list.currentItem()
+        if not current:
+            logger.warning(f"Move {direction} requested, but no layer is selected.")
+            return
+        if self.layers.move(current, direction):
+            logger.debug(f"Moved layer {direction} in Z-order.")
 
     def delete_layer(self):
         """
         Remove currently selected layer from both the scene and the layer list.
-        After deletion, the remaining layers are reordered to maintain consistent Z-values.
+        The other layers keep their Z-values, which stay in list order.
         """
         current = self.layer_list.currentItem()
         if not current:
             logger.warning("Delete requested, but no layer is selected.")
             return
 
-        layer_data = current.data(Qt.ItemDataRole.UserRole)
-        item = hp.unwrap_item(layer_data)
-        self.scene.removeItem(item)
-        self.layer_list.takeItem(self.layer_list.row(current))
-        hp.reorder_list_by_z(self.layer_list)
+        self.layers.remove(current)
         logger.info(f"Deleted layer: {current.text()}")
 
     def select_item(self, current, _):
@@ -0,0 +1,125 @@
+"""
+Uniform grid index over axis-aligned bounding boxes.
+
+Boxes are bucketed into square cells stored in CSR form: one array of box
+ids sorted by cell and one array of cell start offsets. A point query reads
+one cell and a rectangle query the cells it overlaps, so the cost depends on
+the number of boxes near the query, not on the total.
+
+Classes:
+    - GridIndex
+
+Usage Example:
+    index = GridIndex(bboxes)
+    candidates = index.query_point(x, y)
+    inside = index.query_rect(x0, y0, x1, y1)
+"""
+import numpy as np
+
+#: Upper bound of cells, keeps memory linear in the number of boxes
+MAX_CELLS_PER_BOX = 4
+
+
+class GridIndex:
+    """Grid index of `(n, 4)` boxes given as `min x, min y, max x, max y`."""
+
+    def __init__(self, bboxes: np.ndarray, cell_size: float = None):
+        """
+        Build the index.
+
+        Args:
+            bboxes (`np.ndarray`): `(n, 4)` boxes.
+            cell_size (float): Side of a grid cell. Defaults to twice the
+                median box extent, so most boxes fall into one to four cells.
+        """
+        self.bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        if len(self.bboxes):
+            self.origin = self.bboxes[:, :2].min(axis=0)
+            extent = self.bboxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+
+        if cell_size is None:
+            sizes = self.bboxes[:, 2:] - self.bboxes[:, :2]
+            cell_size = 2 * float(np.median(sizes.max(axis=1))) if len(sizes) else 1.0
+            # Keep the grid at most a few cells per box.
+            cell_size = max(cell_size, float(np.sqrt(extent.prod() / (MAX_CELLS_PER_BOX * max(len(sizes), 1)))))
+        self.cell_size = max(cell_size, 1e-9)
+        self.shape = (np.floor(extent / self.cell_size).astype(np.int64) + 1)[::-1]  # rows, columns
+
+        first = self._cells(self.bboxes[:, :2])
+        last = self._cells(self.bboxes[:, 2:])
+        spans = last - first + 1
+        counts = spans[:, 0] * spans[:, 1]
+
+        # One (cell, box) pair per cell a box overlaps.
+        box = np.repeat(np.arange(len(self.bboxes)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        column = first[box, 0] + local % spans[box, 0]
+        row = first[box, 1] + local // spans[box, 0]
+        cell = row * self.shape[1] + column
+
+        order = np.argsort(cell, kind="stable")
+        self._ids = box[order]
+        self._starts = np.searchsorted(cell[order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        """`(column, row)` of the cells holding `points`, clipped to the grid."""
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.shape[::-1] - 1)
+
+    def query_point(self, x: float, y: float) -> np.ndarray:
+        """Ids of the boxes containing the point `(x, y)`."""
+        if not len(self.bboxes):
+            return np.empty(0, dtype=np.int64)
+        column, row = self._cells(np.array([[x, y]]))[0]
+        cell = row * self.shape[1] + column
+        ids = self._ids[self._starts[cell]:self._starts[cell + 1]]
+        b = self.bboxes[ids]
+        return ids[(b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3])]
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Sorted ids of the boxes intersecting the rectangle `(x0, y0)`-`(x1, y1)`."""
+        if not len(self.bboxes):
+            return np.empty(0, dtype=np.int64)
+        (c0, r0), (c1, r1) = self._cells(np.array([[x0, y0], [x1, y1]]))
+        cells = (np.arange(r0, r1 + 1)[:, None] * self.shape[1] + np.arange(c0, c1 + 1)).ravel()
+        starts, ends = self._starts[cells], self._starts[cells + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        ids = np.unique(self._ids[positions])
+        b = self.bboxes[ids]
+        return ids[(b[:, 0] <= x1) & (x0 <= b[:, 2]) & (b[:, 1] <= y1) & (y0 <= b[:, 3])]
+
+
+def points_in_polygon(x: float, y: float, coords: np.ndarray, offsets: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    Even-odd test of the point `(x, y)` against the packed polygons `ids`.
+
+    Args:
+        coords (`np.ndarray`): `(v, 2)` vertices of all polygons.
+        offsets (`np.ndarray`): Polygon `i` spans `coords[offsets[i]:offsets[i + 1]]`.
+        ids (`np.ndarray`): Polygons to test.
+
+    Returns:
+        `np.ndarray`: The ids whose polygon contains the point.
+    """
+    if not len(ids):
+        return ids
+    starts, ends = offsets[ids], offsets[ids + 1]
+    lengths = ends - starts
+    owner = np.repeat(np.arange(len(ids)), lengths)
+    vertex = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    nxt = np.where(vertex + 1 == ends[owner], starts[owner], vertex + 1)
+
+    (xa, ya), (xb, yb) = coords[vertex].T, coords[nxt].T
+    straddles = (ya > y) != (yb > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = xa + (y - ya) * (xb - xa) / (yb - ya)
+    crosses = straddles & (x < crossing)
+    inside = np.bincount(owner, weights=crosses, minlength=len(ids)) % 2 == 1
+    return ids[inside]
@@ -0,0 +1,75 @@
+"""Startup timing for the application.
+
+`ImportTimer` records how long each module takes to import while it is
+active, in the spirit of `python -X importtime`, so the launch log shows
+where time-to-first-window goes.
+
+Usage Example:
+    with ImportTimer() as import_timer:
+        from gui import ApplicationWindow
+    logger.info(import_timer.report())
+"""
+import builtins
+from importlib.util import resolve_name
+import sys
+import time
+
+
+class ImportTimer:
+    """Times imports made through the `import` statement while active."""
+
+    def __init__(self):
+        # name -> (self seconds, cumulative seconds, nesting depth)
+        self.records: dict[str, tuple[float, float, int]] = {}
+        self._children_time: list[float] = []
+        self._original_import = None
+
+    def __enter__(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.__import__ = self._original_import
+        return False
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                name_to_record = resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                name_to_record = name
+        else:
+            name_to_record = name
+
+        if name_to_record in sys.modules or name_to_record in self.records:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        depth = len(self._children_time)
+        self._children_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = self._children_time.pop()
+            if self._children_time:
+                self._children_time[-1] += cumulative
+            self.records[name_to_record] = (cumulative - children, cumulative, depth)
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in top-level imports."""
+        return sum(cumulative for _, cumulative, depth in self.records.values() if depth == 0)
+
+    def report(self, top: int = 15) -> str:
+        """Breakdown of the `top` slowest imports by cumulative time."""
+        slowest = sorted(self.records.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        lines = [f"Import time: {self.total * 1000:.0f} ms"]
+        lines += ["    self [ms] | cumulative [ms] | module"]
+        lines += [
+            f"    {self_time * 1000:9.1f} | {cumulative * 1000:15.1f} | {'  ' * depth}{name}"
+            for name, (self_time, cumulative, depth) in slowest
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+Multi-resolution tile pyramid for image layers.
+
+An image is shown as a small preview scaled to the scene, the same way it
+always was, and sharpened while zooming in with `TILE_SIZE` tiles from a
+pyramid of power-of-two levels: level `k` is the image downsampled `2**k`
+times. Only the tiles visible at the current zoom are requested. They are
+read on a background thread pool and kept in a bounded LRU `TileCache`.
+
+Classes:
+    - TileCache
+    - TilePyramid
+    - TiledImageLayer: Extends QGraphicsPixmapItem
+
+Usage Example:
+    pyramid = TilePyramid(file_path)
+    layer = TiledImageLayer(pyramid, display_size=(1024, 768))
+    scene.addItem(layer)
+"""
+from collections import OrderedDict
+import math
+import threading
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+from PyQt6.QtCore import QObject, QRectF, QRunnable, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsPixmapItem, QStyleOptionGraphicsItem, QWidget
+
+from object_detection.raster import open_raster
+from utils.logger_config import logger
+
+TILE_SIZE = 256
+
+
+def to_qimage(rgb: np.ndarray) -> QImage:
+    """Copy an `(h, w, 3)` uint8 RGB array into a `QImage`."""
+    rgb = np.ascontiguousarray(rgb)
+    height, width = rgb.shape[:2]
+    return QImage(rgb.data, width, height, rgb.strides[0], QImage.Format.Format_RGB888).copy()
+
+
+def fit_size(width: int, height: int, max_width: int, max_height: int) -> tuple[int, int]:
+    """Size of `width` x `height` scaled to fit `max_width` x `max_height`, keeping the aspect ratio."""
+    scale = min(max_width / width, max_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class TileCache:
+    """Thread-safe LRU cache of decoded tiles, bounded in bytes."""
+
+    def __init__(self, max_bytes: int = 256 * 1024**2):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tiles: OrderedDict[tuple, QImage] = OrderedDict()
+        self._nbytes = 0
+
+    def get(self, key: tuple) -> Optional[QImage]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+            return tile
+
+    def put(self, key: tuple, tile: QImage):
+        with self._lock:
+            if key in self._tiles:
+                self._nbytes -= self._tiles.pop(key).sizeInBytes()
+            self._tiles[key] = tile
+            self._nbytes += tile.sizeInBytes()
+            while self._nbytes > self.max_bytes and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self._nbytes -= evicted.sizeInBytes()
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._tiles
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tiles)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._nbytes
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self._nbytes = 0
+
+
+tile_cache = TileCache()
+
+
+class TilePyramid:
+    """
+    Power-of-two levels of an image file, read tile by tile.
+
+    Tiles are windows of the file's :class:`RasterSource` read every
+    `2**level`-th pixel, so no level is ever held in memory whole.
+    """
+
+    def __init__(self, file_path: str, tile_size: int = TILE_SIZE):
+        self.file_path = file_path
+        self.tile_size = tile_size
+        self.source = open_raster(file_path)
+        self.width, self.height = self.source.width, self.source.height
+        #: Level `levels - 1` fits in a single tile
+        self.levels = max(1, math.ceil(math.log2(max(self.width, self.height) / tile_size)) + 1)
+
+    def level_size(self, level: int) -> tuple[int, int]:
+        """`(width, height)` of `level`."""
+        factor = 2**level
+        return math.ceil(self.width / factor), math.ceil(self.height / factor)
+
+    def read_tile(self, level: int, tx: int, ty: int) -> np.ndarray:
+        """`(h, w, 3)` RGB pixels of tile `(tx, ty)` of `level`; edge tiles are smaller."""
+        step = 2**level
+        span = self.tile_size * step
+        return self.source.read(tx * span, ty * span, (tx + 1) * span, (ty + 1) * span, step)
+
+    def preview(self, width: int, height: int) -> np.ndarray:
+        """The whole image resampled to `width` x `height`."""
+        step = max(1, min(self.width // width, self.height // height))
+        pixels = self.source.read(0, 0, self.width, self.height, step)
+        return np.asarray(Image.fromarray(pixels).resize((width, height), Image.Resampling.BILINEAR))
+
+
+class TileSignals(QObject):
+    """Signals of a `TileLoader`, delivered on the GUI thread."""
+
+    loaded = pyqtSignal(object)
+
+
+class TileLoader(QRunnable):
+    """Read one tile into the cache off the GUI thread."""
+
+    def __init__(self, layer: "TiledImageLayer", key: tuple):
+        super().__init__()
+        self.layer = layer
+        self.key = key
+
+    def run(self):
+        _, level, tx, ty = self.key
+        try:
+            if self.key in self.layer.wanted:
+                self.layer.cache.put(self.key, to_qimage(self.layer.pyramid.read_tile(level, tx, ty)))
+        except Exception as e:
+            logger.warning(f"Could not read tile {self.key}: {e}")
+        finally:
+            self.layer.signals.loaded.emit(self.key)
+
+
+class TiledImageLayer(QGraphicsPixmapItem):
+    """
+    Image layer drawing a scene-sized preview sharpened by pyramid tiles.
+
+    `pixmap()` is the preview, so the layer has the same size as an image
+    layer holding the scaled pixmap.
+    """
+
+    _thread_pool: Optional[QThreadPool] = None
+
+    def __init__(
+        self,
+        pyramid: TilePyramid,
+        display_size: tuple[int, int],
+        cache: TileCache = tile_cache,
+        parent: QGraphicsItem = None,
+    ):
+        """
+        Initialize the image layer.
+
+        Args:
+            pyramid (`TilePyramid`): Tiles of the image.
+            display_size (tuple): Maximum `(width, height)` of the layer; the
+                image is fitted into it, keeping its aspect ratio.
+            cache (`TileCache`): Cache the decoded tiles are kept in.
+            parent (`QGraphicsItem`): The parent item, if any.
+        """
+        width, height = fit_size(pyramid.width, pyramid.height, *display_size)
+        super().__init__(QPixmap.fromImage(to_qimage(pyramid.preview(width, height))), parent)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+        self.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+
+        self.pyramid = pyramid
+        self.cache = cache
+        #: Item units per full resolution pixel
+        self.scale_factor = width / pyramid.width
+        #: Tiles visible at the last paint; stale requests are dropped
+        self.wanted: set = set()
+        self._pending: set = set()
+        self.signals = TileSignals()
+        self.signals.loaded.connect(self._on_tile_loaded)
+
+    @classmethod
+    def thread_pool(cls) -> QThreadPool:
+        """Pool the tiles of all image layers are read on."""
+        if cls._thread_pool is None:
+            cls._thread_pool = QThreadPool()
+            cls._thread_pool.setMaxThreadCount(2)
+        return cls._thread_pool
+
+    def level_for(self, lod: float) -> Optional[int]:
+        """
+        Pyramid level matching `lod` screen pixels per item unit.
+
+        `None` when the preview already has enough detail.
+        """
+        # Only a downscaled preview shown magnified lacks detail.
+        if lod <= 1 or self.scale_factor >= 1:
+            return None
+        screen_per_source = lod * self.scale_factor
+        level = math.floor(math.log2(1 / screen_per_source)) if screen_per_source < 1 else 0
+        return min(level, self.pyramid.levels - 1)
+
+    def tiles_in(self, level: int, rect: QRectF) -> list[tuple[int, int]]:
+        """Tiles of `level` intersecting `rect` (item coordinates)."""
+        span = self.pyramid.tile_size * 2**level * self.scale_factor
+        columns, rows = (math.ceil(n / self.pyramid.tile_size) for n in self.pyramid.level_size(level))
+        x0, x1 = max(0, int(rect.left() // span)), min(columns - 1, int(rect.right() // span))
+        y0, y1 = max(0, int(rect.top() // span)), min(rows - 1, int(rect.bottom() // span))
+        return [(tx, ty) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)]
+
+    def tile_rect(self, level: int, tx: int, ty: int, tile: QImage) -> QRectF:
+        """Item rectangle covered by `tile`."""
+        scale = 2**level * self.scale_factor
+        span = self.pyramid.tile_size * scale
+        return QRectF(tx * span, ty * span, tile.width() * scale, tile.height() * scale)
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget = None):
+        """Draw the preview, then the loaded tiles of the level matching the zoom."""
+        super().paint(painter, option, widget)
+
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.level_for(lod)
+        if level is None:
+            self.wanted = set()
+            return
+
+        path = self.pyramid.file_path
+        keys = [(path, level, tx, ty) for tx, ty in self.tiles_in(level, option.exposedRect)]
+        self.wanted = set(keys)
+        for key in keys:
+            tile = self.cache.get(key)
+            if tile is not None:
+                painter.drawImage(self.tile_rect(*key[1:], tile), tile)
+            elif key not in self._pending:
+                self._pending.add(key)
+                self.thread_pool().start(TileLoader(self, key))
+
+    def _on_tile_loaded(self, key: tuple):
+        self._pending.discard(key)
+        tile = self.cache.get(key)
+        if tile is not None:
+            self.update(self.tile_rect(*key[1:], tile))
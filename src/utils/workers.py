@@ -0,0 +1,79 @@
+"""Background workers keeping long-running jobs off the GUI thread.
+
+Classes:
+    - DetectionSignals: Extends QObject.
+    - DetectionWorker: Extends QRunnable.
+
+Usage Example:
+    worker = DetectionWorker(image_path, model_path)
+    worker.signals.result.connect(on_result)
+    QThreadPool.globalInstance().start(worker)
+"""
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from object_detection.object_detection import DetectionCancelled, get_model, predict_polygons
+from utils.logger_config import logger
+
+
+class DetectionSignals(QObject):
+    """Signals emitted by :class:`DetectionWorker`.
+
+    Signals are delivered to receivers on the GUI thread, so slots connected
+    to them may safely touch widgets and the scene.
+    """
+
+    progress = pyqtSignal(int)
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+
+class DetectionWorker(QRunnable):
+    """Loads the model and runs `predict_polygons` on a thread pool thread."""
+
+    def __init__(self, image_path: str, model_path: str, **predict_options):
+        """
+        Args:
+            image_path (str): Image to detect objects on.
+            model_path (str): Model file to detect with.
+            predict_options: Extra keyword arguments for `predict_polygons`.
+        """
+        super().__init__()
+        self.image_path = image_path
+        self.model_path = model_path
+        self.predict_options = predict_options
+        self.signals = DetectionSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Request the detection to stop before its next batch."""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def run(self):
+        try:
+            model = get_model(self.model_path)
+            if self.is_cancelled():
+                raise DetectionCancelled()
+            result = predict_polygons(
+                self.image_path,
+                model,
+                progress_callback=self.signals.progress.emit,
+                cancel_event=self._cancel_event,
+                **self.predict_options,
+            )
+        except DetectionCancelled:
+            logger.info("Detection cancelled.")
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logger.exception(f"Detection failed: {str(e)}")
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
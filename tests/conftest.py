@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="session")
+def tiny_learner():
+    """A randomly initialized two-class segmentation learner on CPU."""
+    import torch
+    from fastai.vision.all import (
+        CrossEntropyLossFlat,
+        DataBlock,
+        ImageBlock,
+        Learner,
+        MaskBlock,
+        Normalize,
+        imagenet_stats,
+    )
+
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (32, 32, 3), dtype=np.uint8) for _ in range(4)]
+    masks = [rng.integers(0, 2, (32, 32), dtype=np.uint8) for _ in range(4)]
+
+    block = DataBlock(
+        blocks=(ImageBlock, MaskBlock(["background", "building"])),
+        get_x=lambda i: images[i],
+        get_y=lambda i: masks[i],
+        batch_tfms=Normalize.from_stats(*imagenet_stats),
+    )
+    dls = block.dataloaders(range(4), bs=2, device="cpu")
+    model = torch.nn.Conv2d(3, 2, 3, padding=1)
+    return Learner(dls, model, loss_func=CrossEntropyLossFlat(axis=1))
+
+
+@pytest.fixture
+def image_files(tmp_path):
+    """A few random RGB images of different sizes."""
+    from PIL import Image
+
+    rng = np.random.default_rng(1)
+    paths = []
+    for i, (height, width) in enumerate([(100, 300), (150, 120), (64, 64)]):
+        path = tmp_path / f"{i}_image.png"
+        Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
@@ -1,6 +1,10 @@
 from pathlib import Path
+import threading
+import time
 
-from PyQt6.QtCore import Qt, QTimer
+import numpy as np
+from PIL import Image
+from PyQt6.QtCore import QPointF, QRectF, Qt, QThreadPool, QTimer
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -11,6 +15,7 @@ from PyQt6.QtWidgets import (
 import pytest
 
 from gui import ApplicationWindow  # type: ignore
+from utils import slots, workers  # type: ignore
 from utils.helpers import get_resource_path, compute_zoom  # type: ignore
 
 
@@ -117,3 +122,170 @@ def test_layer_controls(app_window, qtbot):
 
     assert len(app_window.scene.items()) == 0
     assert app_window.contents_pane.layer_list.count() == 0
+
+
+def add_demo_image(app_window, qtbot, monkeypatch):
+    image_path = str(Path(get_resource_path("resources/demo_images/0_image.tif")))
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", lambda *args, **kwargs: (image_path, ""))
+    qtbot.mouseClick(app_window.contents_pane.add_image_button, Qt.MouseButton.LeftButton)
+    app_window.contents_pane.layer_list.setCurrentRow(0)
+
+
+def test_detect_runs_in_background(app_window, qtbot, monkeypatch, tiny_learner):
+    """Test that detection runs on a worker and adds a polygon layer when done."""
+    add_demo_image(app_window, qtbot, monkeypatch)
+    monkeypatch.setattr(workers, "get_model", lambda _: tiny_learner)
+    monkeypatch.setattr(slots.hp, "show_dialog_box", lambda *args, **kwargs: None)
+    progress = []
+
+    app_window.service.detect()
+    worker = app_window.service.detection_worker
+    worker.signals.progress.connect(progress.append)
+    assert not app_window.contents_pane.detect_objects_button.isEnabled()
+
+    with qtbot.waitSignal(worker.signals.finished, timeout=10000):
+        pass
+
+    assert app_window.contents_pane.layer_list.count() == 2
+    assert app_window.contents_pane.progress_bar.value() == 100
+    assert app_window.contents_pane.detect_objects_button.isEnabled()
+    assert app_window.service.detection_worker is None
+
+
+def test_detect_cancel(app_window, qtbot, monkeypatch, tiny_learner):
+    """Test that a cancelled detection adds no layer."""
+    add_demo_image(app_window, qtbot, monkeypatch)
+    monkeypatch.setattr(workers, "get_model", lambda _: tiny_learner)
+    monkeypatch.setattr(slots.hp, "show_dialog_box", lambda *args, **kwargs: None)
+
+    app_window.service.thread_pool = QThreadPool()
+    app_window.service.thread_pool.setMaxThreadCount(1)
+    blocker = threading.Event()
+    app_window.service.thread_pool.start(blocker.wait)
+
+    app_window.service.detect()
+    worker = app_window.service.detection_worker
+    with qtbot.waitSignal(worker.signals.cancelled, timeout=10000):
+        app_window.service.cancel_detection()
+        blocker.set()
+
+    assert app_window.contents_pane.layer_list.count() == 1
+
+
+def test_add_polygon_layer_is_one_item(app_window, qtbot, monkeypatch):
+    """Test that many buildings are added as one culled polygon layer item."""
+    add_demo_image(app_window, qtbot, monkeypatch)
+    grid = np.stack(np.meshgrid(np.arange(0, 1000, 3), np.arange(0, 1000, 3)), axis=-1).reshape(-1, 1, 2)
+    square = np.array([[0, 0], [0, 2], [2, 2], [2, 0]])
+    polygons = list((grid + square).reshape(len(grid), -1))
+
+    start = time.perf_counter()
+    app_window.service.add_polygon_layer(polygons, mask_shape=(1000, 1000))
+    elapsed = time.perf_counter() - start
+
+    layer = app_window.contents_pane.layer_list.item(0).data(Qt.ItemDataRole.UserRole)["item"]
+    assert len(app_window.scene.items()) == 2
+    assert len(layer) == len(polygons) > 100_000
+    assert elapsed < 2.0
+    assert list(layer.visible_indices(QRectF(0, 0, 4, 1))) == [0, 1]
+
+    view = app_window.map_pane
+    view.fitInView(layer.mapRectToScene(QRectF(0, 0, 30, 30)))
+    view.viewport().grab()
+    painted = sum(p is not None for p in layer._painted)
+    assert 0 < painted < 1000
+
+
+def test_map_pane_picks_and_selects_buildings(app_window, qtbot, monkeypatch):
+    """Test click picking, rubber band selection and hover text of polygon layer buildings."""
+    add_demo_image(app_window, qtbot, monkeypatch)
+    polygons = [
+        np.array([10, 10, 40, 10, 40, 40, 10, 40]),
+        np.array([60, 10, 90, 10, 90, 40, 60, 40]),
+        np.array([10, 60, 40, 60, 40, 90, 10, 90]),
+    ]
+    app_window.service.add_polygon_layer(
+        polygons, mask_shape=(128, 128), building_ids=np.array([4, 7, 9]), areas=np.array([900, 901, 902])
+    )
+    view = app_window.map_pane
+    [layer] = view.polygon_layers()
+    selected = []
+    view.buildings_selected.connect(lambda _, indices: selected.append(list(indices)))
+
+    layer_, index = view.building_at(layer.mapToScene(QPointF(75, 25)))
+    assert layer_ is layer and index == 1
+    assert layer.describe(index) == "Building 7\nArea: 901 px"
+    assert view.building_at(layer.mapToScene(QPointF(50, 50))) == (None, None)
+
+    app_window.show()
+    qtbot.waitExposed(app_window)
+    click_pos = view.mapFromScene(layer.mapToScene(QPointF(25, 75)))
+    qtbot.mouseClick(view.viewport(), Qt.MouseButton.LeftButton, pos=click_pos)
+    assert selected[-1] == [2]
+
+    view.select_in_rect(layer.mapRectToScene(QRectF(0, 0, 100, 30)))
+    assert selected[-1] == [0, 1]
+    assert list(layer.selection) == [0, 1]
+
+
+def test_image_layer_loads_visible_tiles(app_window, qtbot, monkeypatch, tmp_path):
+    """Test that zooming into a large image loads only the visible full resolution tiles."""
+    rows, columns = np.indices((2000, 3000))
+    pixels = np.stack([rows % 256, columns % 256, (rows + columns) % 251], axis=-1).astype(np.uint8)
+    image_path = str(tmp_path / "large.png")
+    Image.fromarray(pixels).save(image_path)
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", lambda *args, **kwargs: (image_path, ""))
+    qtbot.mouseClick(app_window.contents_pane.add_image_button, Qt.MouseButton.LeftButton)
+
+    layer = app_window.scene.items()[0]
+    assert (layer.pixmap().width(), layer.pixmap().height()) == (1024, 683)
+    assert layer.pyramid.levels == 5
+
+    app_window.show()
+    qtbot.waitExposed(app_window)
+    view = app_window.map_pane
+    view.resize(400, 300)
+    view.resetTransform()
+    view.scale(4, 4)
+    view.centerOn(layer.mapToScene(QPointF(500, 300)))
+    view.viewport().grab()
+    assert layer.wanted and all(key[1] == 0 for key in layer.wanted)
+    assert len(layer.wanted) < 6
+    qtbot.waitUntil(lambda: all(key in layer.cache for key in layer.wanted), timeout=5000)
+
+    _, level, tx, ty = key = sorted(layer.wanted)[0]
+    tile = layer.cache.get(key)
+    expected = pixels[ty * 256:(ty + 1) * 256, tx * 256:(tx + 1) * 256]
+    ptr = tile.constBits()
+    ptr.setsize(tile.sizeInBytes())
+    rows = np.frombuffer(ptr, np.uint8).reshape(tile.height(), tile.bytesPerLine())
+    np.testing.assert_array_equal(rows[:, :tile.width() * 3].reshape(expected.shape), expected)
+
+
+def test_layer_stack_keeps_z_in_list_order(app_window, qtbot, monkeypatch):
+    """Test that adding, moving and deleting layers keep z-values in list order."""
+    add_demo_image(app_window, qtbot, monkeypatch)
+    square = np.array([10, 10, 40, 10, 40, 40, 10, 40])
+    app_window.service.add_polygon_layer([square], mask_shape=(128, 128))
+    app_window.service.add_polygon_layer([square + 20], mask_shape=(128, 128))
+    layer_list = app_window.contents_pane.layer_list
+
+    def z_values():
+        return [layer_list.item(row).data(Qt.ItemDataRole.UserRole)["item"].zValue() for row in range(layer_list.count())]
+
+    assert [layer_list.item(row).text() for row in range(3)][-1].startswith("Image")
+    assert z_values() == sorted(z_values(), reverse=True)
+
+    layer_list.setCurrentRow(2)
+    qtbot.mouseClick(app_window.contents_pane.up_button, Qt.MouseButton.LeftButton)
+    assert layer_list.currentRow() == 1 and layer_list.item(1).text().startswith("Image")
+    qtbot.mouseClick(app_window.contents_pane.up_button, Qt.MouseButton.LeftButton)
+    qtbot.mouseClick(app_window.contents_pane.up_button, Qt.MouseButton.LeftButton)
+    assert layer_list.currentRow() == 0
+    assert z_values() == sorted(z_values(), reverse=True)
+
+    qtbot.mouseClick(app_window.contents_pane.delete_button, Qt.MouseButton.LeftButton)
+    assert layer_list.count() == 2 and len(app_window.scene.items()) == 2
+    app_window.service.add_polygon_layer([square], mask_shape=(128, 128))
+    assert z_values() == sorted(z_values(), reverse=True)
+    assert len(set(z_values())) == 3
@@ -0,0 +1,251 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from object_detection import batch  # type: ignore
+from object_detection.backends import FastaiBackend, export_torchscript, load_backend  # type: ignore
+from object_detection.cache import PredictionCache  # type: ignore
+from object_detection.geometry import refine_polygons  # type: ignore
+from object_detection.object_detection import predict_polygons, predict_polygons_batch  # type: ignore
+from object_detection.postprocessing import postprocess_mask, trace_polygons  # type: ignore
+from object_detection.registry import ModelRegistry  # type: ignore
+from object_detection.tiling import predict_tiled, tile_offsets  # type: ignore
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        return object()
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    paths = []
+    for name in ("a.pkl", "b.pkl", "c.pkl"):
+        path = tmp_path / name
+        path.write_bytes(b"model")
+        paths.append(str(path))
+    return paths
+
+
+def test_registry_reuses_loaded_model(model_files):
+    """Test that repeat requests for an unchanged file skip loading."""
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+
+    first = registry.get(model_files[0])
+    second = registry.get(model_files[0])
+
+    assert first is second
+    assert len(loader.calls) == 1
+
+
+def test_registry_reloads_changed_file(model_files):
+    """Test that a modified model file is loaded again."""
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+
+    first = registry.get(model_files[0])
+    stat = os.stat(model_files[0])
+    os.utime(model_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = registry.get(model_files[0])
+
+    assert first is not second
+    assert len(registry) == 1
+
+
+def test_registry_evicts_least_recently_used(model_files):
+    """Test LRU eviction once the entry cap is exceeded."""
+    loader = CountingLoader()
+    registry = ModelRegistry(max_entries=2, loader=loader)
+
+    registry.get(model_files[0])
+    registry.get(model_files[1])
+    registry.get(model_files[0])
+    registry.get(model_files[2])
+
+    assert model_files[0] in registry
+    assert model_files[1] not in registry
+    assert model_files[2] in registry
+
+
+def test_registry_preload(model_files):
+    """Test that preloading warms the registry in the background."""
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+
+    registry.preload(model_files[0]).join(timeout=5)
+    registry.get(model_files[0])
+
+    assert len(loader.calls) == 1
+
+
+def test_tile_offsets_cover_axis():
+    """Test that windows cover the axis and the last one ends at its border."""
+    offsets = tile_offsets(1000, 256, 32)
+    assert offsets[0] == 0
+    assert offsets[-1] == 1000 - 256
+    assert np.all(np.diff(offsets) <= 256 - 32)
+    assert list(tile_offsets(100, 256, 32)) == [0]
+
+
+@pytest.mark.parametrize("shape", [(100, 70), (256, 256), (700, 530)])
+def test_predict_tiled_reconstructs_image(shape):
+    """Test that blending per-tile outputs reproduces a full-resolution mask."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=shape + (3,), dtype=np.uint8)
+    batch_sizes = []
+
+    def predict_batch(tiles):
+        batch_sizes.append(len(tiles))
+        return tiles[..., 0].astype(np.float32) / 255
+
+    fractions = []
+    probabilities = predict_tiled(
+        image, predict_batch, tile_size=128, overlap=16, batch_size=4,
+        progress_callback=fractions.append,
+    )
+
+    assert probabilities.shape == shape
+    np.testing.assert_allclose(probabilities, image[..., 0] / 255, atol=1e-5)
+    assert max(batch_sizes) <= 4
+    assert fractions[-1] == 1.0
+
+
+def test_predict_polygons_batch_matches_single(tiny_learner, image_files):
+    """Test that batched prediction returns the same results as one-by-one prediction."""
+    batched = predict_polygons_batch(image_files, tiny_learner, batch_size=4, tile_size=64, overlap=8)
+    single = [predict_polygons(path, tiny_learner, tile_size=64, overlap=8) for path in image_files]
+
+    assert len(batched) == len(image_files)
+    for result, expected in zip(batched, single):
+        assert result.mask.shape == expected.mask.shape
+        assert result.coverage_pct == pytest.approx(expected.coverage_pct, abs=0.5)
+        assert abs(result.num_features - expected.num_features) <= 2
+
+
+def test_batch_run_resumes_from_manifest(tiny_learner, image_files, tmp_path, monkeypatch):
+    """Test that the headless detector streams results and skips finished inputs."""
+    monkeypatch.setattr(batch, "get_model", lambda _: tiny_learner)
+    output = str(tmp_path / "results.jsonl")
+    options = {"workers": 0, "chunk_size": 2, "tile_size": 64, "overlap": 8}
+
+    assert batch.run_batch(image_files[:2], output, **options) == (2, 0)
+    assert batch.run_batch(image_files, output, **options) == (1, 0)
+
+    with open(output) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["path"] for r in records] == image_files
+    assert records[0]["height"] == 100 and records[0]["width"] == 300
+    assert batch.read_manifest(output + ".manifest") == set(image_files)
+    assert batch.collect_inputs(str(tmp_path)) == sorted(image_files)
+
+
+def test_torchscript_backend_matches_fastai(tiny_learner, tmp_path):
+    """Test that an exported TorchScript model predicts like the learner it came from."""
+    model_path = str(tmp_path / "model.pt")
+    export_torchscript(tiny_learner, model_path, tile_size=64)
+    backend = load_backend(model_path)
+
+    tiles = np.random.default_rng(2).integers(0, 256, (3, 64, 64, 3), dtype=np.uint8)
+    expected = FastaiBackend(tiny_learner).predict_proba(tiles)
+
+    assert backend.tile_size == 64
+    np.testing.assert_allclose(backend.predict_proba(tiles), expected, atol=1e-5)
+    np.testing.assert_allclose(backend.predict_tiles(list(tiles), batch_size=2), expected, atol=1e-5)
+
+
+def test_postprocess_mask_building_stats():
+    """Test per-building statistics from a single post-processing pass."""
+    probabilities = np.zeros((100, 200), dtype=np.float32)
+    probabilities[10:30, 20:60] = 1.0
+    probabilities[50:90, 120:140] = 1.0
+
+    detection = postprocess_mask(probabilities)
+
+    assert detection.num_features == 2
+    assert detection.mask.dtype == bool
+    assert detection.coverage_pct == pytest.approx(detection.mask.mean() * 100)
+    order = np.argsort(detection.centroids[:, 0])
+    np.testing.assert_allclose(detection.centroids[order], [[39.5, 19.5], [129.5, 69.5]], atol=1)
+    np.testing.assert_array_equal(detection.bboxes[order][:, 2:], [[40, 20], [20, 40]])
+    assert detection.areas.sum() == detection.mask.sum()
+    assert sorted(detection.polygon_ids) == [0, 1]
+
+
+def test_refine_polygons_regularizes_rotated_building():
+    """Test that a rasterized rotated rectangle comes back as four right angles."""
+    import cv2
+
+    mask = np.zeros((200, 200), dtype=np.uint8)
+    corners = cv2.boxPoints(((100, 100), (120, 60), 20))
+    cv2.fillPoly(mask, [corners.astype(np.int32)], 1)
+    square = np.array([10, 10, 10, 40, 40, 40, 40, 10], dtype=np.int32)
+    traced = trace_polygons(mask.view(bool)) + [square]
+
+    refined, (before, after) = refine_polygons(traced)
+
+    assert len(refined) == len(traced)
+    assert before == sum(len(p) // 2 for p in traced)
+    assert after == 8
+    rectangle = refined[0].reshape(-1, 2)
+    edges = np.roll(rectangle, -1, axis=0) - rectangle
+    np.testing.assert_allclose(np.sum(edges * np.roll(edges, -1, axis=0), axis=1), 0, atol=1e-2)
+    assert sorted(np.hypot(*edges.T).round()) == pytest.approx([60, 60, 120, 120], abs=2)
+    np.testing.assert_allclose(refined[1], square)
+
+
+def test_refine_polygons_simplify_only():
+    """Test that simplification without regularization keeps polygons on their outline."""
+    staircase = np.array(
+        [[x, x // 2] for x in range(0, 40, 2)] + [[40, 20], [40, 40], [0, 40]], dtype=np.int32
+    ).reshape(-1)
+
+    [refined], (before, after) = refine_polygons([staircase], tolerance=1.0, regularize=False)
+
+    assert after < before
+    assert set(map(tuple, refined.reshape(-1, 2))) <= set(map(tuple, staircase.reshape(-1, 2)))
+
+
+def test_prediction_cache_skips_network(tiny_learner, image_files, tmp_path):
+    """Test that a cached prediction gives the same result without running the model."""
+    model_path = str(tmp_path / "model.pt")
+    export_torchscript(tiny_learner, model_path, tile_size=64)
+    backend = load_backend(model_path)
+    cache = PredictionCache(str(tmp_path / "cache"))
+
+    expected = predict_polygons(image_files[0], backend, tile_size=64, overlap=16, cache=cache)
+    assert len(cache) == 1
+
+    def fail(_):
+        raise AssertionError("the network should not run on a cache hit")
+
+    backend.predict_proba = fail
+    cached = predict_polygons(image_files[0], backend, tile_size=64, overlap=16, cache=cache)
+
+    np.testing.assert_array_equal(cached.mask, expected.mask)
+    assert cached.num_features == expected.num_features
+    for a, b in zip(cached.polygons, expected.polygons, strict=True):
+        np.testing.assert_array_equal(a, b)
+    with pytest.raises(AssertionError):
+        predict_polygons(image_files[0], backend, tile_size=64, overlap=0, cache=cache)
+
+
+def test_prediction_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache stays under its size cap by dropping the oldest entries."""
+    cache = PredictionCache(str(tmp_path), max_bytes=10**9)
+    rng = np.random.default_rng(3)
+    for key in "abc":
+        cache.put(key, rng.random((64, 64), dtype=np.float32))
+        os.utime(os.path.join(tmp_path, f"{key}.npz"), (0, {"a": 1, "b": 3, "c": 2}[key]))
+    cache.max_bytes = cache.nbytes - 1
+
+    cache._evict()
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
@@ -0,0 +1,56 @@
+import numpy as np
+from PIL import Image
+import pytest
+
+from object_detection.raster import RasterSource, open_raster  # type: ignore
+from object_detection.tiling import predict_tiled  # type: ignore
+
+
+@pytest.fixture
+def pixels():
+    return np.random.default_rng(0).integers(0, 256, (150, 200, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize(
+    "name, options, mapped",
+    [
+        ("strips.tif", {"rowsperstrip": 7}, True),
+        ("lzw.tif", {"compression": "tiff_lzw"}, False),
+        ("image.png", {}, False),
+    ],
+)
+def test_raster_source_windows(pixels, tmp_path, name, options, mapped):
+    """Test that windows at any decimation match slicing the decoded image."""
+    path = str(tmp_path / name)
+    Image.fromarray(pixels).save(path, **options)
+    source = RasterSource(path)
+
+    assert source.shape == pixels.shape
+    assert source.is_memory_mapped == mapped
+    for x0, y0, x1, y1, step in [(0, 0, 200, 150, 1), (13, 17, 190, 149, 3), (60, 60, 70, 400, 5), (-5, 0, 200, 150, 16)]:
+        expected = pixels[max(y0, 0):y1:step, max(x0, 0):x1:step]
+        np.testing.assert_array_equal(source.read(x0, y0, x1, y1, step), expected)
+    np.testing.assert_array_equal(source[5:100:2, 7:], pixels[5:100:2, 7:])
+
+
+def test_grayscale_tiff_is_mapped_as_rgb(pixels, tmp_path):
+    """Test that a grayscale TIFF is memory-mapped and served as RGB."""
+    path = str(tmp_path / "gray.tif")
+    Image.fromarray(pixels[..., 0]).save(path)
+    source = open_raster(path)
+
+    assert source.is_memory_mapped
+    assert open_raster(path) is source
+    np.testing.assert_array_equal(source[10:20, 30:40], np.repeat(pixels[10:20, 30:40, :1], 3, axis=2))
+
+
+def test_predict_tiled_reads_raster_source(pixels, tmp_path):
+    """Test that the tiler gives the same mask for a raster source and the decoded array."""
+    path = str(tmp_path / "strips.tif")
+    Image.fromarray(pixels).save(path)
+
+    def predict(tiles):
+        return tiles.mean(axis=-1) / 255
+
+    expected = predict_tiled(pixels, predict, tile_size=64, overlap=16)
+    np.testing.assert_allclose(predict_tiled(open_raster(path), predict, tile_size=64, overlap=16), expected)
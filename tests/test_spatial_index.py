@@ -0,0 +1,37 @@
+import numpy as np
+
+from utils.spatial_index import GridIndex, points_in_polygon  # type: ignore
+
+
+def test_grid_index_matches_brute_force():
+    """Test that point and rectangle queries return the same boxes as a linear scan."""
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, 1000, (5000, 2))
+    bboxes = np.hstack([corners, corners + rng.uniform(1, 30, (5000, 2))])
+    bboxes[0] = [0, 0, 1000, 1000]
+    index = GridIndex(bboxes)
+
+    for x, y in rng.uniform(-10, 1010, (50, 2)):
+        expected = np.flatnonzero(
+            (bboxes[:, 0] <= x) & (x <= bboxes[:, 2]) & (bboxes[:, 1] <= y) & (y <= bboxes[:, 3])
+        )
+        assert sorted(index.query_point(x, y)) == list(expected)
+
+    for x0, y0 in rng.uniform(-10, 1000, (20, 2)):
+        x1, y1 = x0 + 80, y0 + 40
+        expected = np.flatnonzero(
+            (bboxes[:, 0] <= x1) & (x0 <= bboxes[:, 2]) & (bboxes[:, 1] <= y1) & (y0 <= bboxes[:, 3])
+        )
+        assert list(index.query_rect(x0, y0, x1, y1)) == list(expected)
+
+
+def test_points_in_polygon():
+    """Test the even-odd point test on packed polygons."""
+    coords = np.array([[0, 0], [10, 0], [10, 10], [0, 10], [20, 0], [30, 0], [20, 10]], dtype=float)
+    offsets = np.array([0, 4, 7])
+    ids = np.array([0, 1])
+
+    assert list(points_in_polygon(5, 5, coords, offsets, ids)) == [0]
+    assert list(points_in_polygon(22, 2, coords, offsets, ids)) == [1]
+    assert list(points_in_polygon(28, 8, coords, offsets, ids)) == []
+    assert len(GridIndex(np.empty((0, 4))).query_point(1, 1)) == 0
@@ -0,0 +1,50 @@
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Generous enough for slow CI machines, far below the cost of importing torch.
+STARTUP_BUDGET_SECONDS = 2.0
+HEAVY_MODULES = ("torch", "fastai", "cv2", "scipy", "imantics")
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from gui import ApplicationWindow
+app = QApplication(sys.argv)
+window = ApplicationWindow()
+window.show()
+app.processEvents()
+elapsed = time.perf_counter() - start
+loaded = [m for m in {modules!r} if m in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure_startup():
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR), QT_QPA_PLATFORM="offscreen")
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT.format(modules=HEAVY_MODULES)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_startup_skips_heavy_imports():
+    """Test that showing the window does not import the ML stack."""
+    assert measure_startup()["loaded"] == []
+
+
+def test_time_to_first_window_within_budget():
+    """Test that time-to-first-window stays within the startup budget."""
+    # Best of two runs to smooth out a cold disk cache.
+    elapsed = min(measure_startup()["elapsed"] for _ in range(2))
+    assert elapsed < STARTUP_BUDGET_SECONDS